@@ -0,0 +1,342 @@
+"""
+service.py
+
+Synopsis:
+----------
+Headless HTTP service for the model layer, so recommendations and forecasts can be served (e.g. to the mobile
+app) and scaled separately from the Streamlit UI. It is a plain ASGI application with no web framework; run it
+with any ASGI server:
+
+    uvicorn api.service:app --host 0.0.0.0 --port 8000 --workers 4
+
+Each worker process loads the sites and trends tables once (through database.data_access, so snapshots and
+the CSV fallback apply), holds one sentence-transformer and one embedding index, and checks the published data
+versions every BHARATVERSE_VERSION_POLL seconds; the catalog, forecaster and index are only rebuilt when the
+content of a table actually changed. Concurrent interest queries are micro-batched: requests arriving within
+BHARATVERSE_BATCH_WAIT_MS of each other (up to BHARATVERSE_BATCH_SIZE) are encoded and searched in a single
+recommend_by_interest_batch call on a worker thread, so the event loop never blocks on the model.
+
+Endpoints (GET with query parameters, or POST with a JSON body; responses are JSON):
+    - GET  /health: Data versions and row counts.
+    - GET  /metrics: Stage timings and cache counters in the Prometheus text format (not JSON).
+    - POST /recommend/interest: {"query": str, "top_k": int = 2} -> sites ranked by semantic similarity.
+    - POST /recommend/top: {"state", "art_form", "seasonality", "score_threshold": 8.0, "limit": 10,
+      "offset": 0} -> top-rated sites.
+    - POST /forecast: {"state": str, "years": [int] | "year": int} -> projected domestic arrivals.
+
+Classes:
+    - InterestBatcher: Collects concurrent interest queries into batched recommend_by_interest_batch calls.
+    - RecommendationService(loader=load_published_tables, reload_interval=VERSION_POLL, batch_size, batch_wait): The ASGI
+      application; `loader` returns (df_sites, df_trends).
+"""
+
+import asyncio
+import json
+import logging
+import os
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from database.change_data import content_versions
+from database.data_access import VERSION_POLL, load_published_tables
+from model.compact_catalog import compact_frame
+from model.get_popular_site import get_site_catalog
+from model.instrumentation import prometheus_text, timed
+from model.personalised_recommender import recommend_by_interest_batch, warm_up
+from model.trend_predictor import get_forecaster
+
+BATCH_SIZE = int(os.environ.get('BHARATVERSE_BATCH_SIZE', 32))
+BATCH_WAIT = float(os.environ.get('BHARATVERSE_BATCH_WAIT_MS', 5)) / 1000
+logger = logging.getLogger(__name__)
+
+MAX_TOP_K = 50
+MAX_LIMIT = 100
+SITE_COLUMNS = [
+    'SITE_NAME', 'STATE', 'ART_FORM', 'SEASONALITY', 'RESPONSIBLE_SCORE',
+    'LATITUDE', 'LONGITUDE', 'IMAGE_URL', 'DESCRIBTION',
+]
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class InterestBatcher:
+    def __init__(self, max_batch=BATCH_SIZE, max_wait=BATCH_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, df, data_version, query, top_k):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((df, data_version), query, top_k, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            try:
+                if timeout <= 0:
+                    batch.append(self.queue.get_nowait())
+                else:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests read the tables at submit time; a batch spanning a reload is split by data version
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[0][1], []).append(item)
+            for items in groups.values():
+                items = [item for item in items if not item[3].done()]
+                if not items:
+                    continue
+                top_k = max(item[2] for item in items)
+                try:
+                    df, data_version = items[0][0]
+                    results = await loop.run_in_executor(
+                        None, recommend_by_interest_batch, df, [item[1] for item in items], top_k, data_version
+                    )
+                except Exception as exc:
+                    for item in items:
+                        if not item[3].done():
+                            item[3].set_exception(exc)
+                    continue
+                self.batches += 1
+                self.requests += len(items)
+                for item, result in zip(items, results):
+                    if not item[3].done():
+                        item[3].set_result(result.head(item[2]))
+
+
+def _records(df, extra_columns=()):
+    columns = [c for c in SITE_COLUMNS if c in df.columns] + list(extra_columns)
+    names = [c.lower() for c in columns]
+    # tolist() yields plain Python scalars; NaN becomes null so the body stays valid JSON.
+    # float32 columns are rounded so they do not serialize as 25.435800552368164
+    values = [
+        df[c].astype('float64').round(6).tolist() if df[c].dtype == np.float32 else df[c].tolist()
+        for c in columns
+    ]
+    return [
+        {name: None if value != value else value for name, value in zip(names, row)}
+        for row in zip(*values)
+    ]
+
+
+def _int_param(params, name, default, low, high):
+    value = params.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"'{name}' must be an integer")
+    if not low <= value <= high:
+        raise HTTPError(400, f"'{name}' must be between {low} and {high}")
+    return value
+
+
+def _str_param(params, name):
+    value = params.get(name)
+    if value is not None and not isinstance(value, str):
+        raise HTTPError(400, f"'{name}' must be a string")
+    return value
+
+
+class RecommendationService:
+    def __init__(self, loader=load_published_tables, reload_interval=VERSION_POLL, batch_size=BATCH_SIZE,
+                 batch_wait=BATCH_WAIT):
+        self.loader = loader
+        self.reload_interval = reload_interval
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.batcher = None
+        self.df_sites = None
+        self.df_trends = None
+        self.versions = {}
+        self.routes = {
+            '/health': self.health,
+            '/recommend/interest': self.recommend_interest,
+            '/recommend/top': self.recommend_top,
+            '/forecast': self.forecast,
+        }
+        self._tasks = []
+
+    # ----- data -----
+    def load(self):
+        df_sites, df_trends = self.loader()
+        # Hashed before compacting, so the versions equal those published by database/change_data.py
+        versions = {
+            'sites': content_versions('cultural_sites', df_sites)[''],
+            'trends': content_versions('tourism_stats', df_trends)[''],
+        }
+        if versions == self.versions:
+            return
+        df_sites, df_trends = compact_frame(df_sites), compact_frame(df_trends)
+        # Build the per-version structures before swapping, so requests never see a half-loaded state
+        get_site_catalog(df_sites, versions['sites'])
+        get_forecaster(df_trends, data_version=versions['trends'])
+        warm_up(df_sites['DESCRIBTION'].dropna(), versions['sites'])
+        self.df_sites, self.df_trends, self.versions = df_sites, df_trends, versions
+
+    async def _reload_periodically(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await loop.run_in_executor(None, self.load)
+            except Exception:
+                logger.warning('Reloading the tables failed, serving data version %s', self.versions, exc_info=True)
+
+    async def startup(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.load)
+        self.batcher = InterestBatcher(self.batch_size, self.batch_wait)
+        self._tasks.append(asyncio.create_task(self.batcher.run()))
+        if self.reload_interval:
+            self._tasks.append(asyncio.create_task(self._reload_periodically()))
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    # ----- endpoints -----
+    async def health(self, params):
+        return {
+            'status': 'ok',
+            'data_versions': self.versions,
+            'sites': len(self.df_sites),
+            'trends': len(self.df_trends),
+        }
+
+    async def recommend_interest(self, params):
+        query = str(params.get('query') or '').strip()
+        if not query:
+            raise HTTPError(400, "'query' is required")
+        top_k = _int_param(params, 'top_k', 2, 1, MAX_TOP_K)
+        # Captured before awaiting, so a reload in between cannot label the results with a newer version
+        df_sites, data_version = self.df_sites, self.versions['sites']
+        result = await self.batcher.submit(df_sites, data_version, query, top_k)
+        return {'query': query, 'data_version': data_version, 'sites': _records(result, ['similarity'])}
+
+    async def recommend_top(self, params):
+        try:
+            score_threshold = float(params.get('score_threshold', 8.0))
+        except (TypeError, ValueError):
+            raise HTTPError(400, "'score_threshold' must be a number")
+        limit = _int_param(params, 'limit', 10, 1, MAX_LIMIT)
+        offset = _int_param(params, 'offset', 0, 0, len(self.df_sites))
+        filters = {name: _str_param(params, name) for name in ('state', 'art_form', 'seasonality')}
+        catalog = get_site_catalog(self.df_sites, self.versions['sites'])
+        result = catalog.top(score_threshold, limit=limit, offset=offset, **filters)
+        return {'data_version': self.versions['sites'], 'offset': offset, 'sites': _records(result)}
+
+    async def forecast(self, params):
+        state = _str_param(params, 'state')
+        if not state:
+            raise HTTPError(400, "'state' is required")
+        years = params.get('years', params.get('year'))
+        if years is None:
+            raise HTTPError(400, "'year' or 'years' is required")
+        if isinstance(years, str):
+            years = years.split(',')
+        try:
+            years = [int(y) for y in (years if isinstance(years, list) else [years])]
+        except (TypeError, ValueError):
+            raise HTTPError(400, "'years' must be integers")
+        df_trends, data_version = self.df_trends, self.versions['trends']
+        try:
+            predictions = get_forecaster(df_trends, data_version=data_version).predict(state, years)
+        except ValueError as exc:
+            raise HTTPError(404, str(exc))
+        return {
+            'state': state,
+            'data_version': data_version,
+            'forecasts': [{'year': y, 'domestic_arrivals': float(p)} for y, p in zip(years, predictions)],
+        }
+
+    # ----- ASGI -----
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as exc:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(exc)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_params(self, scope, receive):
+        params = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        body = b''
+        more = True
+        while more:
+            message = await receive()
+            body += message.get('body', b'')
+            more = message.get('more_body', False)
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise HTTPError(400, 'Request body must be JSON')
+            if not isinstance(payload, dict):
+                raise HTTPError(400, 'Request body must be a JSON object')
+            params.update(payload)
+        return params
+
+    async def _respond(self, send, status, payload, content_type=b'application/json'):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        path = scope['path'].rstrip('/') or '/'
+        if path == '/metrics':
+            return await self._respond(send, 200, prometheus_text(), b'text/plain; version=0.0.4')
+        try:
+            handler = self.routes.get(path)
+            if handler is None:
+                raise HTTPError(404, f"Unknown endpoint {scope['path']}")
+            if scope['method'] not in ('GET', 'POST'):
+                raise HTTPError(405, 'Use GET or POST')
+            if self.df_sites is None:
+                raise HTTPError(503, 'Service is still loading data')
+            with timed(f'http {path}'):
+                payload = await handler(await self._read_params(scope, receive))
+            status = 200
+        except HTTPError as exc:
+            status, payload = exc.status, {'error': exc.message}
+        except Exception:
+            # Details stay in the server log; clients get no internals
+            logger.exception('Unhandled error on %s', path)
+            status, payload = 500, {'error': 'Internal server error'}
+        await self._respond(send, status, payload)
+
+
+app = RecommendationService()
@@ -0,0 +1,179 @@
+"""
+chart_cache.py
+
+Synopsis:
+----------
+Process-wide cache of the Plotly figures on the Tourism Trends tab. The trends table is aggregated once per
+data version into a STATE x YEAR pivot (district or monthly rows are summed), and every figure is built from
+that pivot and stored as figure JSON keyed by (state, data version), so a rerun in any session only
+deserializes a finished figure instead of filtering the table and rebuilding a px.bar with its layout.
+
+A state's figure can be keyed on that state's own version instead (database/change_data.py), so after a
+data update only the charts of states whose history changed are rebuilt.
+
+The comparison view draws every selected state from the same pivot as a single heatmap trace, so building
+it costs the same whether the pivot has a dozen states or thousands of districts.
+
+Functions:
+    - trend_pivot(df_trends, data_version): Returns the cached STATE x YEAR arrivals pivot.
+    - build_trend_chart(state, years, arrivals): Builds the animated bar chart of one state's yearly arrivals.
+    - build_comparison_chart(pivot, mode='arrivals'): Builds the heatmap of every state in the pivot.
+    - get_trend_chart_json(df_trends, state, data_version, state_version=None): Returns the cached figure JSON for one state.
+    - get_comparison_chart_json(df_trends, states, mode, data_version): Returns the cached comparison JSON.
+"""
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from model.instrumentation import register_cache, timed
+from model.lru_cache import TTLCache
+
+_pivots = register_cache('trend_pivots', TTLCache(maxsize=4, ttl=None))
+_charts = register_cache('charts', TTLCache(maxsize=512, ttl=None))
+
+# Custom green gradient for bars
+GREEN_SHADES = ["#e0ffe6", "#b7e4c7", "#95d5b2", "#74c69d", "#52b788", "#40916c", "#218838"]
+COMPARISON_MODES = {
+    'arrivals': 'Domestic Arrivals (K)',
+    'growth': 'Arrivals vs. First Year (%)',
+}
+
+
+def trend_pivot(df_trends, data_version):
+    pivot = _pivots.get(data_version)
+    if pivot is None:
+        with timed('trend_pivot'):
+            pivot = df_trends.pivot_table(
+                index='STATE', columns='YEAR', values='DOMESTIC_ARRIVALS', aggfunc='sum', observed=True
+            ).sort_index(axis=1)
+            pivot.index = pivot.index.astype(str)
+            pivot.columns = pivot.columns.astype(int)
+        _pivots.put(data_version, pivot)
+    return pivot
+
+
+# Animated bar chart of a state's yearly domestic arrivals
+@timed('chart_build')
+def build_trend_chart(state, years, arrivals):
+    arrivals_k = [round(a / 1000, 1) for a in arrivals]
+    color_seq = GREEN_SHADES * ((len(years) // len(GREEN_SHADES)) + 1)
+    color_seq = color_seq[:len(years)]
+
+    fig = px.bar(
+        x=[str(y) for y in years],
+        y=arrivals_k,
+        labels={'x': 'Year', 'y': 'Domestic Arrivals (K)'},
+        color=[str(y) for y in years],
+        color_discrete_sequence=color_seq,
+        title=f"📊 {state} Tourism Trends",
+        text=[f"{a}K" for a in arrivals_k]
+    )
+
+    fig.update_traces(
+        texttemplate='<b>%{text}</b>',
+        textposition='outside',
+        marker_line_color='#218838',
+        marker_line_width=2.5,
+        opacity=0.96,
+        hovertemplate='<b>Year:</b> %{x}<br><b>Arrivals:</b> %{y}K<extra></extra>'
+    )
+    fig.update_layout(
+        showlegend=False,
+        xaxis_title="<b>Year</b>",
+        yaxis_title="<b>Domestic Arrivals (in Thousands)</b>",
+        plot_bgcolor="#f6fff6",
+        paper_bgcolor="#f6fff6",
+        title_font_size=28,
+        title_font_color="#218838",
+        font=dict(family="Segoe UI, Arial", size=18, color="#222"),
+        bargap=0.15,
+        xaxis=dict(
+            showgrid=False,
+            tickfont=dict(size=17, color="#218838"),
+            tickangle=-25,
+            linecolor="#b7e4c7",
+            linewidth=2.5
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor="#e0e0e0",
+            zeroline=False,
+            tickfont=dict(size=17, color="#388e3c"),
+            linecolor="#b7e4c7",
+            linewidth=2.5
+        ),
+        margin=dict(l=40, r=40, t=80, b=50),
+        height=440,
+        transition={'duration': 600, 'easing': 'cubic-in-out'}
+    )
+    fig.update_yaxes(tickformat=",")
+    return fig
+
+
+@timed('chart_build')
+def build_comparison_chart(pivot, mode='arrivals'):
+    if mode not in COMPARISON_MODES:
+        raise ValueError(f"Unknown comparison mode '{mode}', expected one of {sorted(COMPARISON_MODES)}")
+    values = pivot.to_numpy(dtype=np.float64)
+    if mode == 'growth':
+        # Each state against its own first recorded year, so small and large states share one scale
+        first = pivot.bfill(axis=1).iloc[:, 0].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(first[:, None] > 0, values / first[:, None] * 100, np.nan)
+        text_format, color_scale = '%{z:.0f}%', 'RdYlGn'
+    else:
+        values = np.round(values / 1000, 1)
+        text_format, color_scale = '%{z:,.1f}K', 'Greens'
+
+    # Busiest states (latest year) on top
+    order = np.argsort(np.nan_to_num(pivot.ffill(axis=1).iloc[:, -1].to_numpy(dtype=np.float64)), kind='stable')
+    states = pivot.index.to_numpy()[order]
+    fig = go.Figure(go.Heatmap(
+        z=values[order],
+        x=[str(y) for y in pivot.columns],
+        y=states,
+        colorscale=color_scale,
+        colorbar=dict(title=COMPARISON_MODES[mode]),
+        hovertemplate=f'<b>%{{y}}</b><br><b>Year:</b> %{{x}}<br><b>{COMPARISON_MODES[mode]}:</b> {text_format}<extra></extra>',
+        xgap=2,
+        ygap=2
+    ))
+    fig.update_layout(
+        title=f"🗺️ {COMPARISON_MODES[mode]} by State",
+        plot_bgcolor="#f6fff6",
+        paper_bgcolor="#f6fff6",
+        title_font_color="#218838",
+        font=dict(family="Segoe UI, Arial", size=15, color="#222"),
+        xaxis=dict(showgrid=False, tickfont=dict(color="#218838"), side='top'),
+        yaxis=dict(showgrid=False, automargin=True),
+        margin=dict(l=40, r=40, t=110, b=30),
+        # Keep rows readable as the number of states grows; the component scrolls beyond this
+        height=min(max(320, 26 * len(states) + 140), 2400)
+    )
+    return fig
+
+
+def get_trend_chart_json(df_trends, state, data_version, state_version=None):
+    key = ('state', state, state_version or data_version)
+    figure_json = _charts.get(key)
+    if figure_json is None:
+        # pivot_table drops states without any arrivals; they get an empty chart instead of a KeyError
+        history = trend_pivot(df_trends, data_version).reindex([state]).iloc[0].dropna()
+        figure_json = build_trend_chart(state, history.index.tolist(), history.tolist()).to_json()
+        _charts.put(key, figure_json)
+    return figure_json
+
+
+def get_comparison_chart_json(df_trends, states, mode, data_version):
+    states = tuple(sorted(states)) if states else None
+    key = ('comparison', states, mode, data_version)
+    figure_json = _charts.get(key)
+    if figure_json is None:
+        pivot = trend_pivot(df_trends, data_version)
+        if states is not None:
+            # States without any arrivals are not in the pivot; they show as empty rows
+            pivot = pivot.reindex(list(states))
+        figure_json = build_comparison_chart(pivot, mode).to_json()
+        _charts.put(key, figure_json)
+    return figure_json
@@ -0,0 +1,129 @@
+"""
+inference_executor.py
+
+Synopsis:
+----------
+Background execution of recommendation and forecast calls for the Streamlit app, so a script rerun never
+sits on model inference. Requests are grouped in channels (one per UI widget, e.g. the Tab 4 text area):
+
+    - Coalescing: identical requests (same key) share one in-flight future, and completed results are
+      kept in an LRU, so repeats return immediately.
+    - Debouncing: a request can wait a short delay before starting; if a newer request arrives on the
+      same channel meanwhile, the older one never runs.
+    - Cancellation: a newer request on a channel cancels the channel's previous request if it has not
+      started yet; a superseded request that is already running is simply not shown.
+    - Stale results: the last completed result per channel stays available to render while the new one
+      is computing.
+
+Channels must be private to one user session (e.g. 'interest:<session id>'): the app shares one executor per
+process, and a shared channel would let one session cancel another's request or be shown its stale result.
+Identical requests from different sessions still coalesce on their key, and a request is only cancelled once no
+channel is waiting for it. Per-channel state is kept in LRUs bounded by `max_channels`, so channels of ended
+sessions age out.
+
+Work runs on a thread pool: sentence-transformer encoding and NumPy release the GIL, and threads share the
+process-wide model and indexes instead of loading a copy per worker process.
+
+Classes:
+    - Superseded: Raised by a request that was replaced before it started.
+    - InferenceExecutor(max_workers=2, result_cache_size=256, result_ttl=600, max_channels=1024): The executor.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from model.lru_cache import TTLCache
+
+
+class Superseded(Exception):
+    pass
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers=2, result_cache_size=256, result_ttl=600, max_channels=1024):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inference')
+        self.results = TTLCache(maxsize=result_cache_size, ttl=result_ttl)
+        self._inflight = {}
+        self._latest = TTLCache(maxsize=max_channels, ttl=result_ttl)
+        self._stale = TTLCache(maxsize=max_channels, ttl=result_ttl)
+        self._lock = threading.Lock()
+
+    def _watchers(self, channel, key):
+        future = self._inflight.get(key)
+        return set(getattr(future, 'channels', ())) if future is not None else {channel}
+
+    def _run(self, channel, key, debounce, fn, args, kwargs):
+        if debounce:
+            time.sleep(debounce)
+            with self._lock:
+                watched = bool(self._watchers(channel, key))
+            # Superseded only once every channel that asked for this key has moved on
+            if not watched:
+                raise Superseded(key)
+        value = fn(*args, **kwargs)
+        self.results.put(key, value)
+        with self._lock:
+            for watcher in self._watchers(channel, key):
+                self._stale.put(watcher, (key, value))
+        return value
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _watch(self, channel, key, future):
+        # Moves `channel` onto `future`; returns the channel's previous future if no channel waits for it any more
+        previous_key, previous = self._latest.get(channel, (None, None))
+        if not hasattr(future, 'channels'):
+            future.channels = set()
+        future.channels.add(channel)
+        self._latest.put(channel, (key, future))
+        if previous is None or previous is future:
+            return None
+        previous.channels.discard(channel)
+        return None if previous.channels or previous_key == key else previous
+
+    def submit(self, channel, key, fn, *args, debounce=0.0, **kwargs):
+        """Schedules fn(*args, **kwargs) as the latest request on `channel`; `key` identifies the result."""
+        cached = self.results.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            with self._lock:
+                superseded = self._watch(channel, key, future)
+                self._stale.put(channel, (key, cached))
+            if superseded is not None:
+                superseded.cancel()
+            return future
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                # Run in a copy of the caller's context, so instrumentation traces include background work
+                context = contextvars.copy_context()
+                future = self.pool.submit(context.run, self._run, channel, key, debounce, fn, args, kwargs)
+                self._inflight[key] = future
+                future.add_done_callback(lambda f, key=key: self._done(key, f))
+            superseded = self._watch(channel, key, future)
+        if superseded is not None:
+            superseded.cancel()
+        return future
+
+    def stale(self, channel):
+        """Returns (key, value) of the last completed request on `channel`, or (None, None)."""
+        with self._lock:
+            return self._stale.get(channel, (None, None))
+
+    def resolve(self, channel, key, future, wait=0.0):
+        """Returns (key, value, fresh): the request's result if ready within `wait` seconds, else the stale one."""
+        try:
+            return key, future.result(timeout=wait), True
+        except (FutureTimeout, CancelledError, Superseded):
+            return (*self.stale(channel), False)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
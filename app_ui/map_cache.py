@@ -0,0 +1,92 @@
+"""
+map_cache.py
+
+Synopsis:
+----------
+Process-wide cache of pre-rendered Folium maps for the Explore Sites tab. The map HTML for every art form
+is rendered once per version of that art form's rows and shared by all sessions, instead of every session
+rebuilding a folium.Map and keeping its own copy in st.session_state. Sites are drawn with a FastMarkerCluster: the
+rows are embedded as one compact JSON array and turned into markers (and popups) in the browser, so the
+Python side never creates one folium.Marker per row and large filters stay fast.
+
+Functions:
+    - build_map_html(df): Renders the map for the given sites and returns its HTML.
+    - prerender_maps(df_sites, data_version, art_form_versions=None): Renders and caches the map of every art form.
+    - get_map_html(df_sites, art_form, data_version): Returns the cached map HTML for one art form.
+    - map_height(n_sites): Height in pixels for the map iframe.
+"""
+
+import folium
+from folium.plugins import FastMarkerCluster
+
+from model.instrumentation import register_cache, timed
+from model.lru_cache import TTLCache
+
+_maps = register_cache('maps', TTLCache(maxsize=512, ttl=None))
+
+MARKER_COLUMNS = ['LATITUDE', 'LONGITUDE', 'SITE_NAME', 'IMAGE_URL', 'STATE', 'ART_FORM', 'SEASONALITY', 'RESPONSIBLE_SCORE']
+
+# Builds each marker and its popup in the browser from one compact row (MARKER_COLUMNS order),
+# so the page carries the site data once instead of a full popup document per site
+MARKER_CALLBACK = """
+function (row) {
+    var popup = "<div style='width:230px; font-family:Segoe UI,Arial,sans-serif;'>"
+        + "<h4 style='margin-bottom:4px; color:#218838; font-size:1.13em;'>" + row[2] + "</h4>"
+        + "<img src=\\"" + row[3] + "\\" width=\\"210\\" style='border-radius:10px; margin-bottom:7px; border:2px solid #b7e4c7'><br>"
+        + "<b>State:</b> <span style=\\"color:#a63603;\\">" + row[4] + "</span><br>"
+        + "<b>Art Form:</b> <span style=\\"color:#388e3c;\\">" + row[5] + "</span><br>"
+        + "<b>Seasonality:</b> <span style=\\"color:#007f5f;\\">" + row[6] + "</span><br>"
+        + "<b>Responsible Score:</b> <span style=\\"color:#218838;\\">" + row[7] + "</span>"
+        + "</div>";
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(popup, {maxWidth: 260});
+    marker.bindTooltip(row[2] + " (" + row[4] + ")");
+    return marker;
+};
+"""
+
+
+@timed('map_build')
+def build_map_html(df):
+    m = folium.Map(
+        location=[22.5937, 78.9629],
+        zoom_start=5.5,
+        min_lat=6, max_lat=38,
+        min_lon=68, max_lon=98
+    )
+    m.fit_bounds([[6, 68], [38, 98]])
+    # Coordinates may be float32 (compact_frame); 5 decimals (~1 m) keeps the embedded JSON short
+    rows = df[MARKER_COLUMNS].assign(
+        LATITUDE=df['LATITUDE'].astype('float64').round(5),
+        LONGITUDE=df['LONGITUDE'].astype('float64').round(5),
+        RESPONSIBLE_SCORE=df['RESPONSIBLE_SCORE'].astype(str)
+    ).values.tolist()
+    FastMarkerCluster(
+        rows,
+        callback=MARKER_CALLBACK,
+        # Individual markers from state-level zoom in, so small selections look like plain pins
+        options={'disableClusteringAtZoom': 7, 'maxClusterRadius': 40}
+    ).add_to(m)
+    return m.get_root().render()
+
+
+def get_map_html(df_sites, art_form, data_version):
+    key = (art_form, data_version)
+    html = _maps.get(key)
+    if html is None:
+        html = build_map_html(df_sites[df_sites['ART_FORM'] == art_form])
+        _maps.put(key, html)
+    return html
+
+
+def prerender_maps(df_sites, data_version, art_form_versions=None):
+    # Per art form versions (database/change_data.py) keep the maps of unchanged art forms across updates
+    art_form_versions = art_form_versions or {}
+    for art_form, group in df_sites.groupby('ART_FORM', sort=False, observed=True):
+        key = (art_form, art_form_versions.get(art_form, data_version))
+        if key not in _maps:
+            _maps.put(key, build_map_html(group))
+
+
+def map_height(n_sites):
+    return min(370 + 35 * n_sites, 900)
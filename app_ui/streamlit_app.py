@@ -1,21 +1,33 @@
 import streamlit as st
 import pandas as pd
-import folium
-from streamlit_folium import folium_static
-import plotly.express as px
-import plotly.graph_objects as go
+import streamlit.components.v1 as components
+import plotly.io as pio
 import sys
 import os
 import random
-import snowflake.connector
+import threading
+import calendar
+import uuid
 #from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from model.trend_predictor import predict_future
+from model.trend_predictor import current_forecasts, predict_future
 from model.get_popular_site import recommend_sites, recommend_sites_by_state
-from model.personalised_recommender import recommend_by_interest
+from model.personalised_recommender import recommend_by_interest, warm_up
+from model.hybrid_ranker import rank_sites
+from database.data_access import SNAPSHOT_TTL, VERSION_POLL, load_forecasts, load_tables, published_versions
+from database.change_data import content_versions
+from model.compact_catalog import compact_frame
+from app_ui.map_cache import get_map_html, map_height, prerender_maps
+from app_ui.chart_cache import COMPARISON_MODES, get_comparison_chart_json, get_trend_chart_json
+from app_ui.inference_executor import InferenceExecutor
+from model.instrumentation import cache_stats, finish_trace, register_cache, start_trace, timed
 import numpy as np
 
+# Every stage timed during this rerun is collected for the optional sidebar breakdown
+DEBUG_PANEL = os.environ.get('BHARATVERSE_DEBUG_PANEL') == '1'
+rerun_trace = start_trace('rerun')
+
 # Load environment variables
 #load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', 'pass.env'))
 
@@ -31,30 +43,88 @@ st.markdown("""
 local_css(os.path.join(os.path.dirname(__file__), 'styles', 'styles.css'))
 
 # --------- Snowflake Connection & Data Fetch ---------
-@st.cache_data(show_spinner="Loading data from Snowflake...")
-def fetch_data_from_snowflake():
-    conn = snowflake.connector.connect(
-        user=os.environ['SNOWFLAKE_USER'],
-        password=os.environ['SNOWFLAKE_PASSWORD'],
-        account=os.environ['SNOWFLAKE_ACCOUNT'],
-        warehouse=os.environ['SNOWFLAKE_WAREHOUSE'],
-        database=os.environ['SNOWFLAKE_DATABASE'],
-        schema=os.environ['SNOWFLAKE_SCHEMA']
-    )
-    # Fetch cultural sites
-    df_sites = pd.read_sql(
-        "SELECT site_name, state, art_form, seasonality, responsible_score, latitude, longitude, image_url, describtion FROM cultural_sites",
-        conn
-    )
-    # Fetch tourism stats
-    df_trends = pd.read_sql(
-        "SELECT state, year, domestic_arrivals FROM tourism_stats",
-        conn
-    )
-    conn.close()
-    return df_sites, df_trends
+# Served from local snapshots that are refreshed incrementally from Snowflake once they are older
+# than the TTL; falls back to the snapshot (or data/*.csv) when Snowflake is unavailable.
+# Held once per process in compact form (categorical strings, float32/narrow ints) and shared by every
+# session; cache_resource hands out the same frames instead of a deserialized copy per rerun
+# The versions published by the ingestion scripts are polled every BHARATVERSE_VERSION_POLL seconds, so
+# new data is picked up as soon as it lands instead of when the snapshot TTL runs out
+@st.cache_data(show_spinner=False, ttl=VERSION_POLL)
+def fetch_published_versions():
+    versions = published_versions()
+    return versions.get('cultural_sites', {}).get(''), versions.get('tourism_stats', {}).get('')
+
+@st.cache_resource(show_spinner="Loading data from Snowflake...", ttl=SNAPSHOT_TTL, max_entries=2)
+def fetch_data_from_snowflake(sites_token, trends_token):
+    df_sites, df_trends = load_tables(versions={'cultural_sites': sites_token, 'tourism_stats': trends_token})
+    # Content versions key the process-wide caches so they follow the data, not the session; the per art
+    # form / state versions let maps and charts of unchanged partitions survive a data update. Hashed
+    # before compacting, so they equal the versions published by database/change_data.py
+    site_versions = content_versions('cultural_sites', df_sites)
+    trend_versions = content_versions('tourism_stats', df_trends)
+    data_versions = {
+        'sites': site_versions.pop(''),
+        'trends': trend_versions.pop(''),
+        'art_forms': site_versions,
+        'states': trend_versions,
+    }
+    return compact_frame(df_sites), compact_frame(df_trends), data_versions
+
+with timed('fetch_data'):
+    df_sites, df_trends, data_versions = fetch_data_from_snowflake(*fetch_published_versions())
+
+# Forecasts materialized after ingestion (database/materialize_forecasts.py); only rows computed from the
+# history currently loaded are kept, every other state/year falls back to predict_future
+@st.cache_resource(show_spinner=False, ttl=SNAPSHOT_TTL)
+def fetch_materialized_forecasts(_df_trends, trends_version):
+    return current_forecasts(load_forecasts(), _df_trends)
+
+with timed('fetch_forecasts'):
+    materialized_forecasts = fetch_materialized_forecasts(df_trends, data_versions['trends'])
+
+# Render the map of every art form once per data version, shared by all sessions; after an update only
+# art forms whose rows changed are rendered again
+@st.cache_resource(show_spinner="Preparing maps...", max_entries=2)
+def prerender_site_maps(_df_sites, sites_version, _art_form_versions):
+    prerender_maps(_df_sites, sites_version, _art_form_versions)
+
+prerender_site_maps(df_sites, data_versions['sites'], data_versions['art_forms'])
+
+# Optional warm-up: load the NLP model and embedding index in the background once per process
+@st.cache_resource
+def start_recommender_warm_up(_descriptions, data_version):
+    thread = threading.Thread(target=warm_up, args=(_descriptions, data_version), daemon=True)
+    thread.start()
+    return thread
 
-df_sites, df_trends = fetch_data_from_snowflake()
+if os.environ.get('BHARATVERSE_WARMUP') == '1':
+    start_recommender_warm_up(df_sites['DESCRIBTION'].dropna(), data_versions['sites'])
+
+# Forecasts and recommendations run on a shared background pool; the script only waits INLINE_WAIT seconds
+# for a result and otherwise renders the last one, polling until the fresh result is ready
+INLINE_WAIT = float(os.environ.get('BHARATVERSE_INLINE_WAIT', '0.1'))
+INTEREST_DEBOUNCE = float(os.environ.get('BHARATVERSE_INTEREST_DEBOUNCE', '0.3'))
+POLL_INTERVAL = 0.5
+
+@st.cache_resource
+def get_inference_executor():
+    executor = InferenceExecutor(max_workers=int(os.environ.get('BHARATVERSE_INFERENCE_WORKERS', '2')))
+    register_cache('inference_results', executor.results)
+    return executor
+
+executor = get_inference_executor()
+# The executor is shared by every session; channels carry this session's id so one user's requests never
+# cancel another's or show up as their stale result
+session_id = st.session_state.setdefault('session_id', uuid.uuid4().hex)
+pending = []
+
+def find_matches(df_sites, user_input, travel_month, interest_state, sites_version):
+    if travel_month is None and interest_state is None:
+        return recommend_by_interest(df_sites, user_input, data_version=sites_version)
+    # One pass fusing similarity, responsible score and season fit over the filtered rows
+    return rank_sites(
+        df_sites, user_input, top_k=2, month=travel_month, state=interest_state, data_version=sites_version
+    )
 
 # App Header
 st.markdown("""
@@ -90,41 +160,15 @@ with tab1:
     with col1:
         selected_art = st.selectbox(
             "Select an Art Form to Reveal Its Magic -",
-            df_sites['ART_FORM'].unique(),
+            df_sites['ART_FORM'].unique().tolist(),
             key="art_form_selector"
         )
         filtered_df = df_sites[df_sites['ART_FORM'] == selected_art]
 
-        map_key = f"folium_map_{selected_art}"
-        if st.session_state.get("last_map_art_form") != selected_art or map_key not in st.session_state:
-            m = folium.Map(
-                location=[22.5937, 78.9629],
-                zoom_start=5.5,
-                min_lat=6, max_lat=38,
-                min_lon=68, max_lon=98
-            )
-            m.fit_bounds([[6, 68], [38, 98]])
-            for _, row in filtered_df.iterrows():
-                popup_html = f"""
-                <div style='width:230px; font-family:Segoe UI,Arial,sans-serif;'>
-                    <h4 style='margin-bottom:4px; color:#218838; font-size:1.13em;'>{row['SITE_NAME']}</h4>
-                    <img src="{row['IMAGE_URL']}" width="210" style='border-radius:10px; margin-bottom:7px; border:2px solid #b7e4c7'><br>
-                    <b>State:</b> <span style="color:#a63603;">{row['STATE']}</span><br>
-                    <b>Art Form:</b> <span style="color:#388e3c;">{row['ART_FORM']}</span><br>
-                    <b>Seasonality:</b> <span style="color:#007f5f;">{row['SEASONALITY']}</span><br>
-                    <b>Responsible Score:</b> <span style="color:#218838;">{row['RESPONSIBLE_SCORE']}</span>
-                </div>
-                """
-                folium.Marker(
-                    location=[row['LATITUDE'], row['LONGITUDE']],
-                    popup=folium.Popup(popup_html, max_width=260),
-                    tooltip=f"{row['SITE_NAME']} ({row['STATE']})"
-                ).add_to(m)
-            st.session_state[map_key] = m
-            st.session_state["last_map_art_form"] = selected_art
-
         st.markdown("<div class='map-container'>", unsafe_allow_html=True)
-        folium_static(st.session_state[map_key], height=370 + 35 * len(filtered_df))
+        art_form_version = data_versions['art_forms'].get(selected_art, data_versions['sites'])
+        with timed('map_render'):
+            components.html(get_map_html(df_sites, selected_art, art_form_version), height=map_height(len(filtered_df)))
         st.markdown("</div>", unsafe_allow_html=True)
 
     with col2:
@@ -164,86 +208,65 @@ with tab2:
         <span style="color:#555;">Select a state and a future year to see <b>projected visitor numbers</b> and animated trends. <br>
     </div>
     """, unsafe_allow_html=True)
-    state = st.selectbox("🌏 Choose a State to Explore", df_trends['STATE'].unique())
+    state = st.selectbox("🌏 Choose a State to Explore", df_trends['STATE'].unique().tolist())
     year = st.slider("📅 Pick a Future Year", 2025, 2030, 2025)
-    pred = predict_future(df_trends, state, year)
-    st.markdown(
-        f"""
-        <div style="background:linear-gradient(90deg,#b7e4c7 60%,#ffe066 100%); border-radius:12px; padding:18px 26px; margin-bottom:18px; display:inline-block; box-shadow:0 2px 10px #e0e0e0;">
-            <span style="font-size:1.18em; color:#a63603;"><b>Prediction for {state}:</b></span><br>
-            <span style="font-size:1.13em;">
-                <b>{state}</b> is expected to welcome 
-                <span style="background:#218838; border-radius:7px; padding:5px 14px; color:#fff; font-weight:700; font-size:1.18em;">{int(pred):,}</span>
-                domestic tourists in <b>{year}</b>!
-            </span>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-
-    # Prepare data for animation
-    state_data = df_trends[df_trends['STATE'] == state].sort_values('YEAR')
-    years = state_data['YEAR'].tolist()
-    arrivals = state_data['DOMESTIC_ARRIVALS'].tolist()
-    arrivals_k = [round(a / 1000, 1) for a in arrivals]
-
-    # Custom green gradient for bars
-    green_shades = [
-        "#e0ffe6", "#b7e4c7", "#95d5b2", "#74c69d", "#52b788", "#40916c", "#218838"
-    ]
-    color_seq = green_shades * ((len(years) // len(green_shades)) + 1)
-    color_seq = color_seq[:len(years)]
-
-    fig = px.bar(
-        x=[str(y) for y in years],
-        y=arrivals_k,
-        labels={'x': 'Year', 'y': 'Domestic Arrivals (K)'},
-        color=[str(y) for y in years],
-        color_discrete_sequence=color_seq,
-        title=f"📊 {state} Tourism Trends",
-        text=[f"{a}K" for a in arrivals_k]
-    )
+    forecast_key = ('forecast', data_versions['trends'], state, year)
+    interval = None
+    if materialized_forecasts is not None and (state, year) in materialized_forecasts.index:
+        row = materialized_forecasts.loc[(state, year)]
+        shown_key, pred, fresh = forecast_key, row['FORECAST'], True
+        if pd.notna(row['LOWER']) and pd.notna(row['UPPER']):
+            interval = (row['LOWER'], row['UPPER'], row['CONFIDENCE'])
+    else:
+        forecast_future = executor.submit(
+            f'forecast:{session_id}', forecast_key, predict_future, df_trends, state, year,
+            data_version=data_versions['trends']
+        )
+        shown_key, pred, fresh = executor.resolve(f'forecast:{session_id}', forecast_key, forecast_future, wait=INLINE_WAIT)
+        if not fresh:
+            pending.append(forecast_future)
+    if pred is None and not fresh:
+        st.info("Calculating the forecast...")
+    elif pred is None or pd.isna(pred):
+        st.info(f"No tourist arrivals are recorded for {state}, so there is nothing to forecast.")
+    else:
+        _, _, pred_state, pred_year = shown_key
+        st.markdown(
+            f"""
+            <div style="background:linear-gradient(90deg,#b7e4c7 60%,#ffe066 100%); border-radius:12px; padding:18px 26px; margin-bottom:18px; display:inline-block; box-shadow:0 2px 10px #e0e0e0;">
+                <span style="font-size:1.18em; color:#a63603;"><b>Prediction for {pred_state}:</b></span><br>
+                <span style="font-size:1.13em;">
+                    <b>{pred_state}</b> is expected to welcome 
+                    <span style="background:#218838; border-radius:7px; padding:5px 14px; color:#fff; font-weight:700; font-size:1.18em;">{int(pred):,}</span>
+                    domestic tourists in <b>{pred_year}</b>!
+                </span>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+        if interval is not None:
+            lower, upper, confidence = interval
+            st.caption(f"{confidence:.0%} prediction interval: {int(lower):,} – {int(upper):,} domestic tourists")
+        if not fresh:
+            st.caption(f"Updating the forecast for {state} in {year}...")
 
-    fig.update_traces(
-        texttemplate='<b>%{text}</b>',
-        textposition='outside',
-        marker_line_color='#218838',
-        marker_line_width=2.5,
-        opacity=0.96,
-        hovertemplate='<b>Year:</b> %{x}<br><b>Arrivals:</b> %{y}K<extra></extra>'
-    )
-    fig.update_layout(
-        showlegend=False,
-        xaxis_title="<b>Year</b>",
-        yaxis_title="<b>Domestic Arrivals (in Thousands)</b>",
-        plot_bgcolor="#f6fff6",
-        paper_bgcolor="#f6fff6",
-        title_font_size=28,
-        title_font_color="#218838",
-        font=dict(family="Segoe UI, Arial", size=18, color="#222"),
-        bargap=0.15,
-        xaxis=dict(
-            showgrid=False,
-            tickfont=dict(size=17, color="#218838"),
-            tickangle=-25,
-            linecolor="#b7e4c7",
-            linewidth=2.5
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor="#e0e0e0",
-            zeroline=False,
-            tickfont=dict(size=17, color="#388e3c"),
-            linecolor="#b7e4c7",
-            linewidth=2.5
-        ),
-        margin=dict(l=40, r=40, t=80, b=50),
-        height=440,
-        transition={'duration': 600, 'easing': 'cubic-in-out'}
-    )
-    fig.update_yaxes(tickformat=",")
+    # Figure JSON is built once per state and data version and shared by every session
+    fig = pio.from_json(get_trend_chart_json(df_trends, state, data_versions['trends'], data_versions['states'].get(state)))
+    with timed('chart_render'):
+        st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
 
-    st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
+    with st.expander("📈 Compare states side by side"):
+        compare_states = st.multiselect(
+            "States to compare (all when empty)", df_trends['STATE'].unique().tolist(), key="compare_states"
+        )
+        compare_mode = st.radio(
+            "Show", list(COMPARISON_MODES), format_func=COMPARISON_MODES.get, horizontal=True, key="compare_mode"
+        )
+        comparison = pio.from_json(
+            get_comparison_chart_json(df_trends, compare_states, compare_mode, data_versions['trends'])
+        )
+        with timed('chart_render'):
+            st.plotly_chart(comparison, use_container_width=True, config={"displayModeBar": False})
 
     st.markdown("""
     <div>
@@ -262,8 +285,8 @@ with tab3:
         <span style="color:#555;">Choose a state and unlock a curated list of must-see gems, perfect for the curious and the adventurous.</span>
     </div>
     """, unsafe_allow_html=True)
-    state_selected = st.selectbox("Which State's Treasures Will You Explore ?", df_sites['STATE'].unique(), key="recommend_state")
-    recommended = recommend_sites_by_state(df_sites, state_selected)
+    state_selected = st.selectbox("Which State's Treasures Will You Explore ?", df_sites['STATE'].unique().tolist(), key="recommend_state")
+    recommended = recommend_sites_by_state(df_sites, state_selected, data_version=data_versions['sites'])
 
     st.markdown("<div style='display:flex; flex-direction:column; gap:28px;'>", unsafe_allow_html=True)
     for idx, row in recommended.iterrows():
@@ -307,10 +330,37 @@ with tab4:
     user_input = st.text_area(
         "Tell us what inspires you (e.g., 'I'm fascinated by ancient temples and folk music', 'Love vibrant festivals and art villages'):"
     )
+    with st.expander("Refine by travel month and state (optional)"):
+        travel_month = st.selectbox(
+            "When are you travelling?", [None] + list(range(1, 13)),
+            format_func=lambda m: "Any time" if m is None else calendar.month_name[m],
+            key="interest_month"
+        )
+        interest_state = st.selectbox(
+            "Only in this state", [None] + sorted(df_sites['STATE'].dropna().unique()),
+            format_func=lambda s: "All states" if s is None else s,
+            key="interest_state"
+        )
 
     if user_input:
         st.markdown("#### Top Cultural Sites Curated For You:")
-        top_matches = recommend_by_interest(df_sites, user_input)
+        # Debounced: a newer query arriving within INTEREST_DEBOUNCE replaces this one before it encodes
+        interest_key = (
+            'interest', data_versions['sites'], ' '.join(user_input.split()).lower(), travel_month, interest_state
+        )
+        interest_future = executor.submit(
+            f'interest:{session_id}', interest_key, find_matches, df_sites, user_input, travel_month, interest_state,
+            data_versions['sites'], debounce=INTEREST_DEBOUNCE
+        )
+        _, top_matches, fresh = executor.resolve(f'interest:{session_id}', interest_key, interest_future, wait=INLINE_WAIT)
+        if not fresh:
+            pending.append(interest_future)
+            if top_matches is None:
+                st.info("Finding the sites that match your interests...")
+            else:
+                st.caption("Showing your previous matches while these are updated...")
+        if top_matches is None:
+            top_matches = df_sites.iloc[:0]
         st.markdown("<div style='display:flex; flex-direction:column; gap:24px;'>", unsafe_allow_html=True)
         for _, row in top_matches.iterrows():
             query = f"{row['SITE_NAME']} {row['STATE']}".replace(' ', '+')
@@ -394,3 +444,32 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+finish_trace(rerun_trace)
+if DEBUG_PANEL:
+    with st.sidebar:
+        st.markdown("### ⏱ Last rerun")
+        st.caption(
+            f"{rerun_trace.seconds * 1000:,.0f} ms in total. Background work appears once it finished within the run."
+        )
+        st.dataframe(
+            pd.DataFrame(
+                [(stage, calls, round(seconds * 1000, 2)) for stage, calls, seconds in rerun_trace.breakdown()],
+                columns=['Stage', 'Calls', 'ms']
+            ),
+            hide_index=True, use_container_width=True
+        )
+        st.markdown("**Caches**")
+        st.dataframe(
+            pd.DataFrame.from_dict(cache_stats(), orient='index')[['hits', 'misses', 'hit_rate', 'size']],
+            use_container_width=True
+        )
+
+# Rerun once the background results this run could not wait for are ready; polling happens in a fragment,
+# so the page stays interactive and a newer input simply supersedes the pending request
+if pending and hasattr(st, 'fragment'):
+    @st.fragment(run_every=POLL_INTERVAL)
+    def poll_pending_results():
+        if all(future.done() for future in pending):
+            st.rerun()
+
+    poll_pending_results()
@@ -0,0 +1,61 @@
+"""
+bench_ann.py
+
+Synopsis:
+----------
+Measures recall@k and per-query latency of the IVF backend against the exact cosine scan on clustered
+synthetic embeddings, for a sweep of nprobe values. Use it to pick BHARATVERSE_ANN_NPROBE / NLIST.
+
+Usage:
+    python -m benchmarks.bench_ann --rows 500000 --nprobe 1 4 8 16 32
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_embeddings
+from model.ann_search import ExactSearch, IVFSearch
+
+
+def timed_queries(search, queries, k):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(search(query, k)[0])
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--nlist', type=int, default=None)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    matrix = make_embeddings(args.rows, args.dim)
+    # Queries are perturbed catalog rows, like free text that paraphrases a description
+    queries = make_embeddings(args.queries, args.dim, seed=1) * 0.3 + matrix[:args.queries] * 0.7
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact = ExactSearch(matrix)
+    truth, exact_latency = timed_queries(exact.search, queries, args.top_k)
+
+    start = time.perf_counter()
+    ivf = IVFSearch.build(matrix, nlist=args.nlist)
+    build = time.perf_counter() - start
+    print(f'{args.rows} rows, dim {args.dim}, nlist {len(ivf.centroids)}, IVF build {build:.1f}s')
+    print(f"{'backend':>12} {'recall@' + str(args.top_k):>10} {'ms/query':>9} {'speedup':>8}")
+    print(f"{'exact':>12} {1.0:10.3f} {exact_latency * 1000:9.2f} {'1x':>8}")
+    for nprobe in args.nprobe:
+        found, latency = timed_queries(lambda q, k: ivf.search(q, k, nprobe=nprobe), queries, args.top_k)
+        recall = np.mean([len(np.intersect1d(a, b)) / len(a) for a, b in zip(truth, found)])
+        print(f"{'ivf/' + str(nprobe):>12} {recall:10.3f} {latency * 1000:9.2f} {exact_latency / latency:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
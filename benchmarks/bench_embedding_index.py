@@ -0,0 +1,86 @@
+"""
+bench_embedding_index.py
+
+Synopsis:
+----------
+Compares the original per-row recommend_by_interest path (encode every description, then one cosine
+similarity per row) against the persisted EmbeddingIndex (one query encode plus a matrix-vector product).
+By default it uses the stub encoder so it runs without model weights; pass --real to time the actual
+SentenceTransformer. The per-row path is skipped above --rowwise-max rows since it grows linearly.
+
+Usage:
+    python -m benchmarks.bench_embedding_index --sizes 45 10000 1000000
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import StubEncoder, make_sites
+from model.embedding_index import EmbeddingIndex
+
+QUERY = "I'm fascinated by ancient temples and folk music"
+
+
+def rowwise_query(df, encoder, user_input, top_k):
+    df = df.dropna(subset=['DESCRIBTION']).copy()
+    user_vec = encoder.encode(user_input)
+    df['embedding'] = df['DESCRIBTION'].apply(lambda x: encoder.encode(x))
+    df['similarity'] = df['embedding'].apply(
+        lambda x: float(np.dot(user_vec, x) / (np.linalg.norm(user_vec) * np.linalg.norm(x)))
+    )
+    return df.sort_values('similarity', ascending=False).head(top_k)
+
+
+def index_query(df, index, encoder, user_input, top_k):
+    rows, scores = index.search(encoder.encode(user_input), top_k)
+    return df.iloc[rows]
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[45, 10_000, 1_000_000])
+    parser.add_argument('--top-k', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rowwise-max', type=int, default=10_000)
+    parser.add_argument('--real', action='store_true', help='Use SentenceTransformer instead of the stub encoder.')
+    args = parser.parse_args()
+
+    if args.real:
+        from model.personalised_recommender import get_model
+        encoder = get_model()
+    else:
+        encoder = StubEncoder()
+
+    print(f"{'sites':>10} {'build s':>9} {'resync s':>9} {'index ms':>10} {'per-row ms':>11} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_sites(n)
+        with tempfile.TemporaryDirectory() as index_dir:
+            index = EmbeddingIndex(index_dir, 'benchmark')
+            index.sync(df['DESCRIBTION'], encoder, batch_size=256)
+            build = index.last_sync['seconds']
+            index.sync(df['DESCRIBTION'], encoder)
+            resync = index.last_sync['seconds']
+            index_ms = best_of(lambda: index_query(df, index, encoder, QUERY, args.top_k), args.repeat) * 1000
+
+            if n <= args.rowwise_max:
+                rowwise_ms = best_of(lambda: rowwise_query(df, encoder, QUERY, args.top_k), 1) * 1000
+                rowwise, speedup = f'{rowwise_ms:11.1f}', f'{rowwise_ms / index_ms:7.0f}x'
+            else:
+                rowwise, speedup = f"{'skipped':>11}", f"{'-':>8}"
+            print(f'{n:>10} {build:9.2f} {resync:9.3f} {index_ms:10.2f} {rowwise} {speedup}')
+
+
+if __name__ == '__main__':
+    main()
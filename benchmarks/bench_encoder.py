@@ -0,0 +1,110 @@
+"""
+bench_encoder.py
+
+Synopsis:
+----------
+Latency and memory of the encoder backends (see model/encoders.py) against the reference PyTorch path. Each
+backend runs in a fresh process, so import cost and resident memory are its own: load time, RSS added by
+importing and loading the model, single-query latency (p50/p95 over distinct queries, bypassing the query
+cache), and batch throughput when encoding site descriptions for the index. Backends that cannot load (no
+ONNX export yet, missing packages) are reported and skipped.
+
+Run `python -m model.encoders export` first for the ONNX backends, and `python -m model.encoders parity` to
+check their rankings before switching BHARATVERSE_ENCODER.
+
+Usage:
+    python -m benchmarks.bench_encoder --backends torch torch-int8 onnx onnx-int8 --threads 1
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from benchmarks.memory_report import memory_mb, release_free_memory
+from model.encoders import BACKENDS
+
+INTEREST_WORDS = [
+    'ancient', 'temples', 'folk', 'music', 'dance', 'festivals', 'art', 'villages', 'weaving', 'textiles',
+    'painting', 'forts', 'palaces', 'tribal', 'crafts', 'puppetry', 'spiritual', 'classical', 'rituals',
+    'heritage', 'boat', 'races', 'masks', 'theatre', 'sculpture', 'caves', 'desert', 'mountains', 'coastal',
+]
+
+
+def worker(backend, queries, documents, batch_size, threads, results):
+    try:
+        if threads:
+            # Read by model.encoders at import time
+            os.environ['BHARATVERSE_ONNX_THREADS'] = str(threads)
+            try:
+                import torch
+                torch.set_num_threads(threads)
+            except ImportError:
+                pass
+        from model.encoders import load_encoder
+
+        before = memory_mb()
+        start = time.perf_counter()
+        encoder = load_encoder(backend)
+        load_seconds = time.perf_counter() - start
+        encoder.encode(['warm up'])
+        release_free_memory()
+        loaded = memory_mb()
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            encoder.encode([query], batch_size=1, convert_to_numpy=True, show_progress_bar=False)
+            latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        encoder.encode(documents, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        batch_seconds = time.perf_counter() - start
+        p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+        results.put({
+            'backend': backend, 'load_s': load_seconds, 'model_mb': loaded['rss'] - before['rss'],
+            'peak_mb': memory_mb()['rss'], 'p50_ms': p50, 'p95_ms': p95,
+            'docs_per_s': len(documents) / batch_seconds,
+        })
+    except Exception as exc:
+        results.put({'backend': backend, 'error': f'{type(exc).__name__}: {exc}'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--documents', type=int, default=2_000, help='Synthetic site descriptions to encode.')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=0, help='Intra-op threads (default: the runtime default).')
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import make_sites
+
+    rng = np.random.default_rng(0)
+    queries = [' '.join(rng.choice(INTEREST_WORDS, size=5, replace=False)) for _ in range(args.queries)]
+    documents = make_sites(args.documents)['DESCRIBTION'].tolist()
+
+    context = multiprocessing.get_context('spawn')
+    print(f'queries={args.queries} documents={args.documents} batch_size={args.batch_size} threads={args.threads or "default"}')
+    print(f"{'backend':<12} {'load s':>7} {'model MB':>9} {'peak MB':>8} {'p50 ms':>7} {'p95 ms':>7} {'docs/s':>8}")
+    reference = None
+    for backend in args.backends:
+        results = context.Queue()
+        process = context.Process(target=worker, args=(backend, queries, documents, args.batch_size, args.threads, results))
+        process.start()
+        result = results.get()
+        process.join()
+        if 'error' in result:
+            print(f"{backend:<12} skipped ({result['error']})")
+            continue
+        reference = reference or result
+        speedup = reference['p50_ms'] / result['p50_ms']
+        print(f"{backend:<12} {result['load_s']:7.2f} {result['model_mb']:9.0f} {result['peak_mb']:8.0f} "
+              f"{result['p50_ms']:7.2f} {result['p95_ms']:7.2f} {result['docs_per_s']:8.0f}  "
+              f"({speedup:.1f}x p50 vs {reference['backend']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+bench_geo_index.py
+
+Synopsis:
+----------
+Times "top responsible sites within a radius" and k-nearest queries on a synthetic catalog: a full-frame
+haversine mask-and-sort (what a query on the bare DataFrame costs) against the ball-tree SiteGeoIndex.
+
+Usage:
+    python -m benchmarks.bench_geo_index --rows 1000000 --radius 150
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_sites
+from model.geo_index import SiteGeoIndex, haversine_km
+
+
+def brute_force_radius(df, lat, lon, radius_km, score_threshold):
+    distances = haversine_km(lat, lon, df['LATITUDE'], df['LONGITUDE'])
+    mask = (distances <= radius_km) & (df['RESPONSIBLE_SCORE'] >= score_threshold)
+    return df[mask].assign(DISTANCE_KM=distances[mask]).sort_values('RESPONSIBLE_SCORE', ascending=False)
+
+
+def mean_ms(fn, points):
+    start = time.perf_counter()
+    for lat, lon in points:
+        fn(lat, lon)
+    return (time.perf_counter() - start) / len(points) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--radius', type=float, default=150.0)
+    parser.add_argument('--score', type=float, default=8.0)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    df = make_sites(args.rows)
+    rng = np.random.default_rng(1)
+    points = np.column_stack([rng.uniform(10, 32, args.queries), rng.uniform(72, 92, args.queries)])
+
+    start = time.perf_counter()
+    index = SiteGeoIndex(df)
+    build = time.perf_counter() - start
+
+    lat, lon = points[0]
+    expected = brute_force_radius(df, lat, lon, args.radius, args.score)
+    got = index.within_radius(lat, lon, args.radius, args.score)
+    assert set(expected['SITE_NAME']) == set(got['SITE_NAME'])
+
+    brute_ms = mean_ms(lambda a, b: brute_force_radius(df, a, b, args.radius, args.score), points[:10])
+    radius_ms = mean_ms(lambda a, b: index.within_radius(a, b, args.radius, args.score), points)
+    top_ms = mean_ms(lambda a, b: index.within_radius(a, b, args.radius, args.score, top_k=args.k), points)
+    knn_ms = mean_ms(lambda a, b: index.nearest(a, b, args.k, args.score), points)
+
+    print(f'{args.rows:,} sites, index build {build:.2f}s, ~{len(got):,} matches per {args.radius:g} km query')
+    print(f"{'query':<36} {'ms':>9}")
+    print(f"{'brute-force mask + sort':<36} {brute_ms:9.2f}")
+    print(f"{'index: all within radius':<36} {radius_ms:9.2f}")
+    print(f"{'index: top ' + str(args.k) + ' within radius':<36} {top_ms:9.2f}")
+    print(f"{'index: ' + str(args.k) + ' nearest (score filter)':<36} {knn_ms:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
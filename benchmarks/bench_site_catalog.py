@@ -0,0 +1,68 @@
+"""
+bench_site_catalog.py
+
+Synopsis:
+----------
+Compares the original mask-and-sort implementation of recommend_sites / recommend_sites_by_state against
+the pre-sorted SiteCatalog (binary search plus slice), including paged top-k and combined filters.
+
+Usage:
+    python -m benchmarks.bench_site_catalog --rows 10000 1000000
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetic import make_sites
+from model.get_popular_site import SiteCatalog
+
+
+def mask_and_sort_by_state(df, state, score_threshold=8.0):
+    return df[(df['STATE'] == state) & (df['RESPONSIBLE_SCORE'] >= score_threshold)].sort_values(
+        by='RESPONSIBLE_SCORE', ascending=False)
+
+
+def mask_and_sort(df, score_threshold=8.0):
+    return df[df['RESPONSIBLE_SCORE'] >= score_threshold].sort_values(by='RESPONSIBLE_SCORE', ascending=False)
+
+
+def mean_ms(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--calls', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'query':<28} {'mask+sort ms':>13} {'catalog ms':>11} {'speedup':>8}")
+    for rows in args.rows:
+        df = make_sites(rows)
+        states = df['STATE'].unique()
+        start = time.perf_counter()
+        catalog = SiteCatalog(df)
+        print(f'{rows:>9} {"build":<28} {"":>13} {(time.perf_counter() - start) * 1000:11.1f}')
+
+        scenarios = [
+            ('by state', lambda i: mask_and_sort_by_state(df, states[i % len(states)]),
+             lambda i: catalog.top(8.0, state=states[i % len(states)])),
+            ('all sites', lambda i: mask_and_sort(df), lambda i: catalog.top(8.0)),
+            ('by state, page of 10', lambda i: mask_and_sort_by_state(df, states[i % len(states)]).iloc[10:20],
+             lambda i: catalog.top(8.0, limit=10, offset=10, state=states[i % len(states)])),
+            ('state + art form + season',
+             lambda i: mask_and_sort_by_state(df, states[i % len(states)]).query(
+                 "ART_FORM == 'Folk' and SEASONALITY == 'Winter'"),
+             lambda i: catalog.top(8.0, state=states[i % len(states)], art_form='Folk', seasonality='Winter')),
+        ]
+        for name, baseline, indexed in scenarios:
+            baseline_ms = mean_ms(baseline, args.calls)
+            catalog_ms = mean_ms(indexed, args.calls)
+            print(f'{rows:>9} {name:<28} {baseline_ms:13.2f} {catalog_ms:11.3f} {baseline_ms / catalog_ms:7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
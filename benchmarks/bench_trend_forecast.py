@@ -0,0 +1,80 @@
+"""
+bench_trend_forecast.py
+
+Synopsis:
+----------
+Per-call forecast latency of the original path (filter the frame and fit a fresh sklearn LinearRegression
+for every slider move) against TrendForecaster: a cold call (fingerprint + fit every group), a warm call
+(fingerprint + cached coefficients) and a pre-fetched forecaster predicting the full 2025-2030 range.
+
+Usage:
+    python -m benchmarks.bench_trend_forecast --groups 36 5000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_trends
+from model import trend_predictor
+from model.trend_predictor import TrendForecaster, get_forecaster, predict_future
+
+HORIZON = np.arange(2025, 2031)
+
+
+def per_call_ms(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def sklearn_predict(df, group_col, group, year):
+    from sklearn.linear_model import LinearRegression
+    group_df = df[df[group_col] == group]
+    model = LinearRegression().fit(group_df[['YEAR']], group_df['DOMESTIC_ARRIVALS'])
+    return model.predict([[year]])[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', type=int, nargs='+', default=[36, 5000])
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        import sklearn  # noqa: F401
+        have_sklearn = True
+    except ImportError:
+        have_sklearn = False
+        print('sklearn is not installed; skipping the original LinearRegression path.')
+
+    print(f"{'groups':>7} {'rows':>8} {'sklearn ms':>11} {'cold ms':>9} {'warm ms':>9} {'range us':>9}")
+    for groups in args.groups:
+        group_col = 'STATE' if groups <= 100 else 'DISTRICT'
+        df = make_trends(groups, group_col=group_col)
+        names = df[group_col].unique()
+        pick = lambda i: names[i % len(names)]
+
+        sklearn_ms = f"{'-':>11}"
+        if have_sklearn:
+            sklearn_ms = f'{per_call_ms(lambda i: sklearn_predict(df, group_col, pick(i), 2027), args.calls):11.2f}'
+
+        def cold(i):
+            trend_predictor._forecasters.clear()
+            get_forecaster(df, group_col).predict(pick(i), 2027)
+        cold_ms = per_call_ms(cold, max(1, args.calls // 10))
+        warm_ms = per_call_ms(lambda i: get_forecaster(df, group_col).predict(pick(i), 2027), args.calls)
+        forecaster = TrendForecaster.fit(df, group_col)
+        range_us = per_call_ms(lambda i: forecaster.predict(pick(i), HORIZON), args.calls) * 1000
+        print(f'{groups:>7} {len(df):>8} {sklearn_ms} {cold_ms:9.2f} {warm_ms:9.3f} {range_us:9.1f}')
+
+    # Sanity check against the public API on the state-level data
+    df = make_trends(36)
+    state = df['STATE'].iloc[0]
+    assert np.isclose(predict_future(df, state, 2027), get_forecaster(df).predict(state, 2027))
+
+
+if __name__ == '__main__':
+    main()
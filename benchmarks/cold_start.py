@@ -0,0 +1,99 @@
+"""
+cold_start.py
+
+Synopsis:
+----------
+Measures process cold-start cost: the wall-clock time of importing each heavy dependency and each module of
+the app in a fresh interpreter, the combined import set of app_ui/streamlit_app.py, and (with --model) the
+time to load the sentence-transformer. Results can be written as JSON and compared against a previous run
+to catch startup regressions.
+
+Usage:
+    python -m benchmarks.cold_start --json cold_start.json
+    python -m benchmarks.cold_start --baseline cold_start.json
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_FILE = os.path.join(REPO_ROOT, 'app_ui', 'streamlit_app.py')
+
+HEAVY_IMPORTS = [
+    'numpy', 'pandas', 'torch', 'sklearn', 'sentence_transformers', 'onnxruntime',
+    'streamlit', 'folium', 'plotly.express', 'snowflake.connector',
+]
+MODEL_IMPORTS = ['model.get_popular_site', 'model.trend_predictor', 'model.personalised_recommender']
+REGRESSION_TOLERANCE = 1.2
+
+
+def app_import_statements():
+    # Module-level imports of the Streamlit script, without executing the script itself
+    tree = ast.parse(open(APP_FILE).read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def time_in_subprocess(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            return None, completed.stderr.strip().splitlines()[-1]
+        timings.append(elapsed)
+    return min(timings), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Best-of-N fresh interpreters per measurement.')
+    parser.add_argument('--model', action='store_true', help='Also time loading the sentence-transformer.')
+    parser.add_argument('--json', help='Write results to this file.')
+    parser.add_argument('--baseline', help='Compare against a previous --json result.')
+    args = parser.parse_args()
+
+    scenarios = {'python (empty)': 'pass'}
+    scenarios.update({f'import {name}': f'import {name}' for name in HEAVY_IMPORTS + MODEL_IMPORTS})
+    scenarios['app_ui/streamlit_app.py imports'] = (
+        f'import sys; sys.path.insert(0, {REPO_ROOT!r})\n' + '\n'.join(app_import_statements())
+    )
+    if args.model:
+        scenarios['model load (get_model)'] = (
+            'from model.personalised_recommender import get_model; get_model()'
+        )
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'scenario':<42} {'seconds':>8} {'baseline':>9}")
+    for name, code in scenarios.items():
+        seconds, error = time_in_subprocess(code, args.repeat)
+        if seconds is None:
+            print(f'{name:<42} {"failed":>8}  {error}')
+            continue
+        results[name] = seconds
+        previous = baseline.get(name)
+        flag = ''
+        if previous is not None and seconds > previous * REGRESSION_TOLERANCE:
+            flag = '  REGRESSION'
+        previous_text = f'{previous:9.3f}' if previous is not None else f"{'-':>9}"
+        print(f'{name:<42} {seconds:8.3f} {previous_text}{flag}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
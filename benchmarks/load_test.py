@@ -0,0 +1,167 @@
+"""
+load_test.py
+
+Synopsis:
+----------
+Local load test for the headless service (api/service.py). The ASGI app is driven in-process, with no server
+or network in between, so the numbers isolate the service and model layers. For each concurrency level a
+fixed number of requests is issued by that many concurrent clients, and p50/p95/p99 latency and throughput
+are reported per endpoint mix.
+
+By default the stub encoder stands in for the sentence-transformer (with --encode-ms simulating the model's
+per-call cost, which is what micro-batching amortizes); pass --real to load the actual model. Interest
+queries are random word combinations, so most of them miss the query cache.
+
+Usage:
+    python -m benchmarks.load_test --endpoint interest --concurrency 1 8 32 128
+    python -m benchmarks.load_test --endpoint mix --sites 100000 --batch-size 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import StubEncoder, load_sites_csv, load_trends_csv, make_sites
+
+INTEREST_WORDS = [
+    'ancient', 'temples', 'folk', 'music', 'dance', 'festivals', 'art', 'villages', 'weaving', 'textiles',
+    'painting', 'murals', 'forts', 'palaces', 'tribal', 'crafts', 'pottery', 'puppetry', 'monasteries',
+    'spiritual', 'classical', 'rituals', 'architecture', 'heritage', 'boat', 'races', 'masks', 'theatre',
+    'handloom', 'sculpture', 'caves', 'desert', 'mountains', 'coastal', 'cuisine', 'markets',
+]
+
+
+class TimedStubEncoder(StubEncoder):
+    """StubEncoder with a fixed sleep per encode call, standing in for the model's per-batch overhead."""
+
+    def __init__(self, encode_ms=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.encode_seconds = encode_ms / 1000
+
+    def encode(self, sentences, **kwargs):
+        if self.encode_seconds:
+            time.sleep(self.encode_seconds)
+        return super().encode(sentences, **kwargs)
+
+
+def make_requests(endpoint, n, states, seed=0):
+    rng = np.random.default_rng(seed)
+    requests = []
+    for i in range(n):
+        kind = endpoint if endpoint != 'mix' else ('interest', 'interest', 'top', 'forecast')[i % 4]
+        if kind == 'interest':
+            words = rng.choice(INTEREST_WORDS, size=4, replace=False)
+            requests.append(('/recommend/interest', {'query': ' '.join(words), 'top_k': 2}))
+        elif kind == 'top':
+            requests.append(('/recommend/top', {'state': str(rng.choice(states)), 'limit': 10}))
+        else:
+            requests.append(('/forecast', {'state': str(rng.choice(states)), 'years': [2025, 2030]}))
+    return requests
+
+
+async def call(app, path, payload):
+    body = json.dumps(payload).encode()
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'', 'headers': []}
+    received = False
+    response = {}
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {'type': 'http.disconnect'}
+        received = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+
+    await app(scope, receive, send)
+    return response['status']
+
+
+async def run_level(app, requests, concurrency):
+    latencies = []
+    errors = 0
+    queue = iter(requests)
+
+    async def client():
+        nonlocal errors
+        for path, payload in queue:
+            start = time.perf_counter()
+            status = await call(app, path, payload)
+            latencies.append(time.perf_counter() - start)
+            errors += status != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        'concurrency': concurrency, 'requests': len(latencies), 'errors': errors,
+        'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'throughput_rps': len(latencies) / wall,
+    }
+
+
+async def run(args):
+    from api.service import RecommendationService
+    from model import personalised_recommender
+
+    if not args.real:
+        personalised_recommender._model = TimedStubEncoder(args.encode_ms)
+    sites = make_sites(args.sites) if args.sites else load_sites_csv()
+    trends = load_trends_csv()
+    app = RecommendationService(
+        loader=lambda: (sites, trends), reload_interval=None,
+        batch_size=args.batch_size, batch_wait=args.batch_wait_ms / 1000
+    )
+    await app.startup()
+    states = trends['STATE'].unique()
+
+    print(f"endpoint={args.endpoint} sites={len(sites)} batch_size={args.batch_size} "
+          f"batch_wait_ms={args.batch_wait_ms} encoder={'real' if args.real else f'stub+{args.encode_ms}ms'}")
+    print(f"{'conc':>5} {'reqs':>6} {'errs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9} {'avg batch':>10}")
+    results = []
+    for level, concurrency in enumerate(args.concurrency):
+        requests = make_requests(args.endpoint, args.requests, states, seed=level + 1)
+        batches, batched = app.batcher.batches, app.batcher.requests
+        result = await run_level(app, requests, concurrency)
+        batches = app.batcher.batches - batches
+        result['avg_batch'] = (app.batcher.requests - batched) / batches if batches else 0.0
+        results.append(result)
+        print(f"{concurrency:>5} {result['requests']:>6} {result['errors']:>5} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['throughput_rps']:>9.0f} "
+              f"{result['avg_batch']:>10.1f}")
+    await app.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', choices=['interest', 'top', 'forecast', 'mix'], default='interest')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per concurrency level.')
+    parser.add_argument('--sites', type=int, default=0, help='Synthetic site count (default: the bundled CSV).')
+    parser.add_argument('--batch-size', type=int, default=32, help='Max interest queries per model call.')
+    parser.add_argument('--batch-wait-ms', type=float, default=5.0)
+    parser.add_argument('--encode-ms', type=float, default=5.0, help='Simulated cost per stub encode call.')
+    parser.add_argument('--real', action='store_true', help='Use SentenceTransformer instead of the stub encoder.')
+    parser.add_argument('--json', help='Write results to this file.')
+    args = parser.parse_args()
+
+    # Keep the benchmark's embeddings out of the app's persisted index
+    with tempfile.TemporaryDirectory() as index_dir:
+        os.environ['BHARATVERSE_INDEX_DIR'] = index_dir
+        results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+memory_report.py
+
+Synopsis:
+----------
+Per-worker memory of the in-process site and trend catalogs, before and after compaction. It starts
+--workers fresh processes per layout (as a multi-worker Streamlit or uvicorn deployment would), has each
+one load the same synthetic tables and build what the app builds per data version (SiteCatalog,
+CompactCatalog, forecaster), and reports every worker's RSS and PSS while all of them are alive. PSS splits
+shared pages between the processes mapping them, so the sum of PSS is the real footprint of the fleet.
+
+    - original: object-dtype frames, float64 columns, and the embedding matrix read into private memory.
+    - compact: compact_frame() (categorical strings, float32 / narrow ints) and the embedding matrix as a
+      read-only mmap of the persisted index, shared through the page cache.
+
+Linux only for RSS/PSS (/proc/self/smaps_rollup); elsewhere the peak RSS of each worker is reported.
+
+Usage:
+    python -m benchmarks.memory_report --sites 200000 --workers 4
+"""
+
+import argparse
+import ctypes
+import gc
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+
+import numpy as np
+
+LAYOUTS = ('original', 'compact')
+
+
+def memory_mb():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith(' '))
+        kb = {name: int(fields[name].split()[0]) for name in ('Rss', 'Pss')}
+        return {'rss': kb['Rss'] / 1024, 'pss': kb['Pss'] / 1024}
+    except (OSError, KeyError, ValueError):
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'rss': peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 'pss': None}
+
+
+def release_free_memory():
+    # Return freed heap pages to the OS (libc heap and Arrow's pool, which backs pandas string columns),
+    # so RSS reflects what is still referenced rather than allocator slack
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    try:
+        import pyarrow
+        pyarrow.default_memory_pool().release_unused()
+    except ImportError:
+        pass
+
+
+def worker(layout, sites, districts, index_dir, barrier, results):
+    from benchmarks.synthetic import make_district_trends, make_sites
+    from model.compact_catalog import CompactCatalog, compact_frame
+    from model.embedding_index import EmbeddingIndex
+    from model.get_popular_site import SiteCatalog
+    from model.trend_predictor import TrendForecaster
+
+    before = memory_mb()
+    df_sites = make_sites(sites)
+    df_trends = make_district_trends(districts)
+    embeddings = EmbeddingIndex.load(index_dir, 'benchmark').matrix
+    if layout == 'compact':
+        df_sites, df_trends = compact_frame(df_sites), compact_frame(df_trends)
+    else:
+        embeddings = np.array(embeddings)
+    # Touch every page, as serving queries would
+    float(embeddings.sum())
+
+    catalogs = (SiteCatalog(df_sites), CompactCatalog(df_sites, embeddings), TrendForecaster.fit(df_trends, 'DISTRICT'))
+    frames_mb = (df_sites.memory_usage(deep=True).sum() + df_trends.memory_usage(deep=True).sum()) / 2 ** 20
+
+    release_free_memory()
+    barrier.wait()
+    after = memory_mb()
+    barrier.wait()
+    results.put({'layout': layout, 'pid': os.getpid(), 'before': before, 'after': after, 'frames_mb': frames_mb})
+    del catalogs
+
+
+def run_layout(layout, args, index_dir):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(layout, args.sites, args.districts, index_dir, barrier, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=200_000)
+    parser.add_argument('--districts', type=int, default=1_000, help='Districts per state in the trends table.')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import StubEncoder, make_sites
+    from model.embedding_index import EmbeddingIndex
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        # One persisted index for all workers, like data/index in a deployment
+        EmbeddingIndex(index_dir, 'benchmark').sync(make_sites(args.sites)['DESCRIBTION'], StubEncoder(), batch_size=4096)
+
+        print(f'sites={args.sites} districts/state={args.districts} workers={args.workers}')
+        print(f"{'layout':<10} {'worker':>8} {'frames MB':>10} {'RSS start':>10} {'RSS loaded':>11} {'PSS loaded':>11}")
+        totals = {}
+        for layout in LAYOUTS:
+            reports = run_layout(layout, args, index_dir)
+            for report in reports:
+                pss = report['after']['pss']
+                print(f"{layout:<10} {report['pid']:>8} {report['frames_mb']:>10.1f} {report['before']['rss']:>10.1f} "
+                      f"{report['after']['rss']:>11.1f} {pss if pss is None else f'{pss:.1f}':>11}")
+            totals[layout] = (
+                sum(r['after']['rss'] - r['before']['rss'] for r in reports),
+                sum(r['after']['pss'] or 0.0 for r in reports),
+            )
+
+    print()
+    for layout, (rss_growth, pss) in totals.items():
+        print(f'{layout:<10} RSS growth per worker {rss_growth / args.workers:8.1f} MB   '
+              f'fleet PSS {pss:8.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+suite.py
+
+Synopsis:
+----------
+Reproducible benchmark suite for the model layer. It times every public function of
+model/get_popular_site.py, model/trend_predictor.py and model/personalised_recommender.py on synthetic data
+of several sizes (see synthetic.py: sites scaled from cultural_sites.csv, state x district x year arrivals
+scaled from tourism_stats.csv), with fixed seeds so runs are comparable across commits and machines.
+
+Each scenario reports the mean milliseconds per call over the best of --repeat rounds. Cold scenarios
+(catalog build, forecaster fit, index build) bypass the module caches; warm ones go through them, as the app
+does. Results are written as JSON (with the environment they were measured in) and can be compared against
+a saved baseline: scenarios slower than baseline x --tolerance are flagged as regressions, and
+--fail-on-regression turns that into a non-zero exit code for CI.
+
+The recommender runs on the stub encoder by default, so no weights are downloaded; --real times the actual
+sentence-transformer (keep --recommender-sites small then).
+
+Usage:
+    python -m benchmarks.suite --json baseline.json
+    python -m benchmarks.suite --baseline baseline.json --fail-on-regression
+    python -m benchmarks.suite --only trend_predictor --districts 10 1000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import StubEncoder, load_trends_csv, make_district_trends, make_sites
+
+REGRESSION_TOLERANCE = 1.2
+MODULES = ('get_popular_site', 'trend_predictor', 'personalised_recommender')
+HORIZON = np.arange(2025, 2031)
+QUERY_WORDS = [
+    'ancient', 'temples', 'folk', 'music', 'dance', 'festivals', 'art', 'villages', 'weaving', 'textiles',
+    'painting', 'forts', 'palaces', 'tribal', 'crafts', 'puppetry', 'spiritual', 'classical', 'rituals',
+    'heritage', 'boat', 'races', 'masks', 'theatre', 'sculpture', 'caves', 'desert', 'mountains', 'coastal',
+]
+
+
+def measure(fn, calls, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def make_queries(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [' '.join(rng.choice(QUERY_WORDS, size=4, replace=False)) for _ in range(n)]
+
+
+def popular_site_scenarios(sizes):
+    from model.get_popular_site import SiteCatalog, get_site_catalog, recommend_sites, recommend_sites_by_state
+
+    for n in sizes:
+        df = make_sites(n)
+        version = f'sites-{n}'
+        states = df['STATE'].unique()
+        get_site_catalog(df, version)
+        yield f'get_popular_site.SiteCatalog build [sites={n}]', lambda i: SiteCatalog(df), 1
+        yield f'get_popular_site.recommend_sites [sites={n}]', lambda i: recommend_sites(df, data_version=version), 20
+        yield (f'get_popular_site.recommend_sites_by_state [sites={n}]',
+               lambda i: recommend_sites_by_state(df, states[i % len(states)], data_version=version), 200)
+        yield (f'get_popular_site.recommend_sites (identity key) [sites={n}]',
+               lambda i: recommend_sites(df), 5)
+        catalog = get_site_catalog(df, version)
+        yield (f'get_popular_site.SiteCatalog.top page of 20 [sites={n}]',
+               lambda i: catalog.top(7.0, limit=20, offset=20 * (i % 10), state=states[i % len(states)]), 500)
+
+
+def trend_scenarios(districts):
+    from model.trend_predictor import TrendForecaster, get_forecaster, predict_future, train_trend_model
+
+    states = load_trends_csv()['STATE'].unique()
+    for d in districts:
+        df = make_district_trends(d)
+        state_df = df.groupby(['STATE', 'YEAR'], as_index=False)['DOMESTIC_ARRIVALS'].sum()
+        label = f'districts={d}, rows={len(df)}'
+        yield (f'trend_predictor.train_trend_model (one state) [{label}]',
+               lambda i: train_trend_model(df[df['STATE'] == states[i % len(states)]]), 20)
+        yield f'trend_predictor.TrendForecaster.fit by district [{label}]', lambda i: TrendForecaster.fit(df, 'DISTRICT'), 3
+        get_forecaster(df, 'DISTRICT')
+        yield f'trend_predictor.get_forecaster warm [{label}]', lambda i: get_forecaster(df, 'DISTRICT'), 20
+        forecaster = get_forecaster(df, 'DISTRICT')
+        yield (f'trend_predictor.TrendForecaster.predict_all 2025-2030 [{label}]',
+               lambda i: forecaster.predict_all(HORIZON), 50)
+        get_forecaster(state_df)
+        yield (f'trend_predictor.predict_future (state totals) [{label}]',
+               lambda i: predict_future(state_df, states[i % len(states)], 2025 + i % 6), 500)
+
+
+def recommender_scenarios(sizes, encoder, batch_size):
+    from model import personalised_recommender
+    from model.embedding_index import EmbeddingIndex
+
+    personalised_recommender._model = encoder
+    for n in sizes:
+        df = make_sites(n)
+        descriptions = df['DESCRIBTION']
+        version = f'sites-{n}'
+        with tempfile.TemporaryDirectory() as index_dir:
+            def build(i):
+                EmbeddingIndex(index_dir, 'benchmark').sync(descriptions, encoder, batch_size=256, persist=False)
+            yield f'personalised_recommender index build [sites={n}]', build, 1
+
+            # Point the module's index at a scratch directory for the warm scenarios
+            personalised_recommender._index = EmbeddingIndex(index_dir, personalised_recommender.INDEX_NAME)
+            personalised_recommender._snapshots.clear()
+            personalised_recommender.get_index(descriptions, version)
+            yield f'personalised_recommender.get_index resync [sites={n}]', lambda i: personalised_recommender.get_index(descriptions), 5
+            yield (f'personalised_recommender.get_index by data_version [sites={n}]',
+                   lambda i: personalised_recommender.get_index(descriptions, version), 200)
+
+            misses = iter(make_queries(100_000, seed=n))
+            yield (f'personalised_recommender.encode_queries miss [sites={n}]',
+                   lambda i: personalised_recommender.encode_queries([next(misses)]), 50)
+            hits = make_queries(10, seed=1)
+            personalised_recommender.encode_queries(hits)
+            yield (f'personalised_recommender.encode_queries hit [sites={n}]',
+                   lambda i: personalised_recommender.encode_queries([hits[i % len(hits)]]), 500)
+            yield (f'personalised_recommender.recommend_by_interest [sites={n}]',
+                   lambda i: personalised_recommender.recommend_by_interest(df, next(misses), data_version=version), 50)
+            yield (f'personalised_recommender.recommend_by_interest_batch x{batch_size} [sites={n}]',
+                   lambda i: personalised_recommender.recommend_by_interest_batch(
+                       df, [next(misses) for _ in range(batch_size)], data_version=version), 5)
+        personalised_recommender._index = None
+        personalised_recommender._index_version = None
+
+
+def environment(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'encoder': 'sentence-transformer' if args.real else 'stub',
+        'repeat': args.repeat,
+    }
+
+
+def compare(ms, previous, tolerance):
+    if previous is None:
+        return f"{'-':>9} {'':>8}", ''
+    change = ms / previous - 1 if previous else 0.0
+    flag = 'REGRESSION' if ms > previous * tolerance else 'improved' if ms * tolerance < previous else ''
+    return f'{previous:9.3f} {change:+8.0%}', flag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=MODULES, default=list(MODULES))
+    parser.add_argument('--sites', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--recommender-sites', type=int, nargs='+', help='Defaults to --sites (2,000 with --real).')
+    parser.add_argument('--districts', type=int, nargs='+', default=[10, 1_000], help='Districts per state.')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--real', action='store_true', help='Use SentenceTransformer instead of the stub encoder.')
+    parser.add_argument('--json', help='Write results to this file.')
+    parser.add_argument('--baseline', help='Compare against a previous --json result.')
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    if args.real:
+        from model.personalised_recommender import get_model
+        encoder = get_model()
+    else:
+        encoder = StubEncoder()
+    recommender_sites = args.recommender_sites or ([2_000] if args.real else args.sites)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {name: entry['ms'] for name, entry in json.load(f)['results'].items()}
+
+    groups = {
+        'get_popular_site': lambda: popular_site_scenarios(args.sites),
+        'trend_predictor': lambda: trend_scenarios(args.districts),
+        'personalised_recommender': lambda: recommender_scenarios(recommender_sites, encoder, args.batch_size),
+    }
+    results = {}
+    regressions = []
+    print(f"{'scenario':<84} {'ms/call':>10} {'baseline':>9} {'change':>8}")
+    for module in args.only:
+        for name, fn, calls in groups[module]():
+            ms = measure(fn, calls, args.repeat)
+            results[name] = {'ms': ms, 'calls': calls}
+            previous_text, flag = compare(ms, baseline.get(name), args.tolerance)
+            if flag == 'REGRESSION':
+                regressions.append(name)
+            print(f'{name:<84} {ms:10.3f} {previous_text}  {flag}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'environment': environment(args), 'results': results}, f, indent=2)
+    if baseline:
+        print(f'{len(regressions)} regression(s) beyond {args.tolerance:.2f}x of the baseline')
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
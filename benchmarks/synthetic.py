@@ -0,0 +1,151 @@
+"""
+synthetic.py
+
+Synopsis:
+----------
+Synthetic data helpers for the benchmark scripts. They scale the bundled CSVs to arbitrary sizes so the
+model layer can be timed without Snowflake, and provide a stub encoder so the recommender can be exercised
+without downloading sentence-transformer weights.
+
+Synthetic sites keep the state, art form and seasonality of a real site, sit within a few dozen km of it
+(so coordinates stay inside India and inside the right state), and get a description assembled from the
+real descriptions' sentences (intro, detail, experience, "Ideal for ..."), so text length and vocabulary
+match what the encoder sees in production. Every description is distinct.
+
+Classes:
+    - StubEncoder: Deterministic, vectorized stand-in for SentenceTransformer.encode.
+
+Functions:
+    - load_sites_csv(): Returns data/cultural_sites.csv with the Snowflake (upper-case) column names.
+    - make_sites(n, seed=0): Returns n synthetic cultural site rows.
+    - load_trends_csv(): Returns data/tourism_stats.csv with the Snowflake (upper-case) column names.
+    - make_trends(groups, years=range(2018, 2025), group_col='STATE', seed=0): Returns synthetic yearly arrivals.
+    - make_district_trends(districts_per_state, years=range(2018, 2025), seed=0): Splits the real state series
+      into STATE x DISTRICT x YEAR rows.
+    - make_embeddings(n, dim=384, clusters=200, spread=0.6, seed=0): Returns clustered unit vectors.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+# Bounding box of India (lat, lon), used to clip jittered coordinates
+INDIA_BOUNDS = ((6.5, 35.7), (68.1, 97.4))
+COVID_YEARS = (2020, 2021)
+
+
+class StubEncoder:
+    """Maps each text to a fixed pseudo-random unit vector derived from its hash."""
+
+    def __init__(self, dim=384, seed=0):
+        self.dim = dim
+        self.projection = np.random.default_rng(seed).standard_normal((64, dim)).astype(np.float32)
+
+    def encode(self, sentences, batch_size=64, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        hashes = pd.util.hash_array(np.asarray(texts, dtype=object)).astype('<u8')
+        bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1).astype(np.float32)
+        vectors = (bits * 2 - 1) @ self.projection
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[0] if single else vectors
+
+
+def load_sites_csv():
+    df = pd.read_csv(os.path.join(DATA_DIR, 'cultural_sites.csv'))
+    df.columns = [c.upper() for c in df.columns]
+    return df
+
+
+def load_trends_csv():
+    df = pd.read_csv(os.path.join(DATA_DIR, 'tourism_stats.csv'))
+    df.columns = [c.upper() for c in df.columns]
+    return df
+
+
+def make_sites(n, seed=0):
+    rng = np.random.default_rng(seed)
+    base = load_sites_csv()
+    picks = rng.integers(0, len(base), n)
+    df = base.iloc[picks].reset_index(drop=True)
+    ids = pd.Series(np.arange(n)).astype(str)
+    df['SITE_NAME'] = df['SITE_NAME'] + ' #' + ids
+
+    # Every real description is four sentences: keep the site's own intro and recombine the rest slot by slot
+    sentences = base['DESCRIBTION'].str.rstrip('.').str.split(r'\. ', n=3, expand=True)
+    description = df['SITE_NAME'] + ': ' + sentences[0].to_numpy(dtype=object)[picks] + '.'
+    for slot in sentences.columns[1:]:
+        pool = sentences[slot].dropna().to_numpy(dtype=object)
+        description = description + ' ' + pool[rng.integers(0, len(pool), n)] + '.'
+    # The unique site name keeps every description distinct, so nothing is deduplicated by its content hash
+    df['DESCRIBTION'] = description
+
+    df['RESPONSIBLE_SCORE'] = np.round(np.clip(df['RESPONSIBLE_SCORE'] + rng.normal(0, 0.8, n), 5.0, 10.0), 1)
+    # Within ~40 km of the real site (so in the same state), clipped to India's bounding box
+    (lat_min, lat_max), (lon_min, lon_max) = INDIA_BOUNDS
+    df['LATITUDE'] = np.clip(df['LATITUDE'] + rng.normal(0, 0.35, n), lat_min, lat_max)
+    df['LONGITUDE'] = np.clip(df['LONGITUDE'] + rng.normal(0, 0.35, n), lon_min, lon_max)
+    return df
+
+
+def make_embeddings(n, dim=384, clusters=200, spread=0.6, seed=0):
+    # Topic-clustered unit vectors; real description embeddings are far from uniformly spread
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += rng.standard_normal((n, dim), dtype=np.float32) * (spread / np.sqrt(dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def make_trends(groups, years=range(2018, 2025), group_col='STATE', seed=0):
+    rng = np.random.default_rng(seed)
+    years = np.asarray(list(years))
+    names = np.array([f'{group_col.title()} {i:05d}' for i in range(groups)], dtype=object)
+    base = rng.lognormal(16, 1.2, groups)
+    growth = rng.normal(0.06, 0.05, groups)
+    arrivals = base[:, None] * (1 + growth[:, None]) ** (years - years[0])[None, :]
+    # A COVID-style dip in 2020-2021, as in the real series
+    arrivals *= np.where(np.isin(years, COVID_YEARS), rng.uniform(0.3, 0.6, (groups, 1)), 1.0)
+    arrivals *= rng.normal(1.0, 0.05, arrivals.shape)
+    return pd.DataFrame({
+        group_col: np.repeat(names, len(years)),
+        'YEAR': np.tile(years, groups),
+        'DOMESTIC_ARRIVALS': np.maximum(arrivals, 0).astype(np.int64).ravel(),
+    })
+
+
+def make_district_trends(districts_per_state, years=range(2018, 2025), seed=0):
+    rng = np.random.default_rng(seed)
+    real = load_trends_csv().pivot(index='STATE', columns='YEAR', values='DOMESTIC_ARRIVALS').astype(np.float64)
+    years = np.asarray(list(years))
+
+    # Years outside the CSV follow each state's growth between its first and last non-COVID year
+    clean = [y for y in real.columns if y not in COVID_YEARS]
+    first, last = clean[0], clean[-1]
+    growth = (real[last] / real[first]) ** (1 / (last - first))
+    extrapolated = real[first].to_numpy()[:, None] * growth.to_numpy()[:, None] ** (years - first)[None, :]
+    state_series = real.reindex(columns=years).to_numpy()
+    state_series = np.where(np.isnan(state_series), extrapolated, state_series)
+
+    states = real.index.to_numpy(dtype=object)
+    n_states, n_years = len(states), len(years)
+    # District shares of the state total, each district drifting slightly from the state's trend
+    shares = rng.dirichlet(np.ones(districts_per_state), n_states)
+    tilt = rng.normal(0, 0.03, (n_states, districts_per_state))
+    arrivals = (state_series[:, None, :] * shares[:, :, None]
+                * (1 + tilt[:, :, None]) ** (years - years[0])[None, None, :])
+    arrivals *= rng.normal(1.0, 0.05, arrivals.shape)
+
+    districts = np.array([f'{state} District {i:04d}' for state in states for i in range(districts_per_state)],
+                         dtype=object)
+    return pd.DataFrame({
+        'STATE': np.repeat(states, districts_per_state * n_years),
+        'DISTRICT': np.repeat(districts, n_years),
+        'YEAR': np.tile(years, n_states * districts_per_state),
+        'DOMESTIC_ARRIVALS': np.maximum(arrivals, 0).astype(np.int64).ravel(),
+    })
@@ -0,0 +1,218 @@
+"""
+change_data.py
+
+Synopsis:
+----------
+Change-data ingestion for cultural_sites and tourism_stats. Every source row is hashed on its content, and the
+hashes of the last ingested state are kept in a manifest per target (data/manifests/), so re-running an
+ingestion diffs the source against the manifest and writes only what changed: new keys are inserted,
+changed rows updated and keys missing from the source deleted. Without a manifest (first run, or --rescan)
+the baseline is read back from the table itself.
+
+After every change the pipeline publishes content version tokens to the data_versions table: one for the
+whole table (partition_key '') and one per partition (art form for cultural_sites, state for tourism_stats).
+The tokens only depend on row content, so content_versions() computes the same values from the frames the app
+loads: the app polls the published tokens to reload as soon as data changes, and keys its caches on the
+partition tokens so only the maps and charts of changed art forms / states are rebuilt. Embeddings are
+content-addressed already (only changed descriptions are re-encoded) and tourism_forecasts refits only
+changed states (materialize_forecasts.py).
+
+Settings (environment variables):
+    - BHARATVERSE_MANIFEST_DIR: Manifest directory (default data/manifests).
+
+Functions:
+    - row_hashes(table, df): Returns a uint64 content hash per row.
+    - content_versions(table, df): Returns {'' : table token, partition: token, ...}.
+    - load_manifest(adapter, table, manifest_dir=MANIFEST_DIR): Returns the last ingested keys and hashes, or None.
+    - diff_changes(table, df, manifest): Returns the inserted, updated and deleted rows.
+    - publish_versions(adapter, table, df): Writes the content versions of df to data_versions.
+    - ingest_changes(adapter, table, df, chunk_size=DEFAULT_CHUNK_SIZE, rescan=False): Diffs, applies and publishes.
+    - sync_manifest(adapter, table): Rebuilds the manifest and tokens from the table (after a streamed load).
+    - format_change_report(report): One-line summary of a change-data ingestion.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from database.ingest import DEFAULT_CHUNK_SIZE, TABLES, ingest, read_table
+
+MANIFEST_DIR = os.environ.get(
+    'BHARATVERSE_MANIFEST_DIR',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'manifests')
+)
+MANIFEST_META = 'manifest.json'
+
+PARTITION_COLUMNS = {
+    'cultural_sites': 'art_form',
+    'tourism_stats': 'state',
+}
+# Canonical dtypes, so a row hashes the same from the CSV, SQLite or Snowflake; hash frames before
+# compact_frame(), whose float32 columns would change the hashes
+INTEGER_COLUMNS = {'year', 'domestic_arrivals'}
+FLOAT_COLUMNS = {'responsible_score', 'latitude', 'longitude'}
+
+
+def _normalize(table, df):
+    df = df.rename(columns=str.lower)[TABLES[table]['columns']]
+    columns = {}
+    for column in df.columns:
+        if column in INTEGER_COLUMNS:
+            columns[column] = df[column].to_numpy(dtype=np.int64)
+        elif column in FLOAT_COLUMNS:
+            columns[column] = df[column].to_numpy(dtype=np.float64)
+        else:
+            columns[column] = df[column].to_numpy(dtype=object)
+    return pd.DataFrame(columns)
+
+
+def row_hashes(table, df):
+    return pd.util.hash_pandas_object(_normalize(table, df), index=False).to_numpy(dtype=np.uint64)
+
+
+def _token(hashes):
+    # Sorted, so the token does not depend on the order rows come back from the database
+    return hashlib.sha1(np.sort(hashes).tobytes()).hexdigest()[:16]
+
+
+def content_versions(table, df):
+    hashes = row_hashes(table, df)
+    versions = {'': _token(hashes)}
+    partitions = df.rename(columns=str.lower)[PARTITION_COLUMNS[table]].astype(str).to_numpy(dtype=object)
+    for partition, positions in pd.Series(partitions).groupby(partitions, sort=True).indices.items():
+        versions[partition] = _token(hashes[positions])
+    return versions
+
+
+def _manifest_dir(adapter, manifest_dir):
+    # One manifest per target; SQLite targets are also told apart by file, since --sqlite-path can vary
+    path = getattr(adapter, 'path', None)
+    name = adapter.name if path is None else f'{adapter.name}-{os.path.splitext(os.path.basename(path))[0]}'
+    return os.path.join(manifest_dir, name)
+
+
+def _manifest_frame(table, df):
+    keys = TABLES[table]['keys']
+    manifest = df.rename(columns=str.lower)[keys].reset_index(drop=True).astype(object)
+    manifest['row_hash'] = row_hashes(table, df)
+    return manifest
+
+
+def load_manifest(adapter, table, manifest_dir=MANIFEST_DIR):
+    path = os.path.join(_manifest_dir(adapter, manifest_dir), f'{table}.parquet')
+    if not os.path.exists(path):
+        return None
+    manifest = pd.read_parquet(path)
+    manifest[TABLES[table]['keys']] = manifest[TABLES[table]['keys']].astype(object)
+    return manifest
+
+
+def _save_manifest(adapter, table, manifest, versions, manifest_dir=MANIFEST_DIR):
+    directory = _manifest_dir(adapter, manifest_dir)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f'{table}.parquet.{os.getpid()}.tmp')
+    manifest.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, os.path.join(directory, f'{table}.parquet'))
+
+    meta_path = os.path.join(directory, MANIFEST_META)
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+    meta[table] = {'version': versions[''], 'rows': len(manifest), 'ingested_at': time.time()}
+    with open(f'{meta_path}.{os.getpid()}.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(f'{meta_path}.{os.getpid()}.tmp', meta_path)
+
+
+def diff_changes(table, df, manifest):
+    keys = TABLES[table]['keys']
+    source = df.rename(columns=str.lower).drop_duplicates(subset=keys, keep='last').reset_index(drop=True)
+    current = _manifest_frame(table, source)
+    if manifest is None or manifest.empty:
+        return {'source': source, 'manifest': current, 'inserts': source, 'updates': source.iloc[:0],
+                'deletes': pd.DataFrame(columns=keys)}
+
+    merged = current.merge(manifest, on=keys, how='outer', suffixes=('', '_old'), indicator=True)
+    inserted = merged['_merge'] == 'left_only'
+    updated = (merged['_merge'] == 'both') & (merged['row_hash'] != merged['row_hash_old'])
+    deleted = merged['_merge'] == 'right_only'
+    # current is positionally aligned with source; map the changed keys back to full source rows
+    positions = current.reset_index().merge(merged.loc[inserted | updated, keys], on=keys)['index']
+    changed = source.iloc[positions.to_numpy()]
+    new_keys = pd.MultiIndex.from_frame(merged.loc[inserted, keys])
+    is_new = pd.MultiIndex.from_frame(changed[keys].astype(object)).isin(new_keys)
+    return {
+        'source': source,
+        'manifest': current,
+        'inserts': changed[is_new],
+        'updates': changed[~is_new],
+        'deletes': merged.loc[deleted, keys].reset_index(drop=True),
+    }
+
+
+def publish_versions(adapter, table, df):
+    versions = content_versions(table, df)
+    counts = df.rename(columns=str.lower)[PARTITION_COLUMNS[table]].astype(str).value_counts()
+    published = pd.DataFrame({
+        'table_name': table,
+        'partition_key': list(versions),
+        'version': list(versions.values()),
+        'row_count': [len(df) if partition == '' else int(counts[partition]) for partition in versions],
+    })
+    ingest(adapter, 'data_versions', published)
+    # Partitions that no longer exist (an art form or state with no rows left) are withdrawn
+    existing = read_table(adapter, 'data_versions')
+    gone = existing[(existing['table_name'] == table) & ~existing['partition_key'].isin(list(versions))]
+    if len(gone):
+        adapter.delete('data_versions', gone[['table_name', 'partition_key']])
+    return versions
+
+
+def ingest_changes(adapter, table, df, chunk_size=DEFAULT_CHUNK_SIZE, rescan=False, manifest_dir=MANIFEST_DIR):
+    start = time.perf_counter()
+    manifest = None if rescan else load_manifest(adapter, table, manifest_dir)
+    if manifest is None:
+        # No record of the last run: diff against what the table holds now
+        manifest = _manifest_frame(table, read_table(adapter, table))
+    changes = diff_changes(table, df, manifest)
+
+    upserts = pd.concat([changes['inserts'], changes['updates']], ignore_index=True)
+    if len(upserts):
+        ingest(adapter, table, upserts, chunk_size)
+    deletes = changes['deletes']
+    for offset in range(0, len(deletes), chunk_size):
+        adapter.delete(table, deletes.iloc[offset:offset + chunk_size])
+
+    versions = publish_versions(adapter, table, changes['source'])
+    _save_manifest(adapter, table, changes['manifest'], versions, manifest_dir)
+    seconds = time.perf_counter() - start
+    return {
+        'table': table,
+        'target': adapter.name,
+        'inserted': len(changes['inserts']),
+        'updated': len(changes['updates']),
+        'deleted': len(deletes),
+        'unchanged': len(changes['source']) - len(upserts),
+        'version': versions[''],
+        'seconds': seconds,
+    }
+
+
+def sync_manifest(adapter, table, manifest_dir=MANIFEST_DIR):
+    df = read_table(adapter, table)
+    versions = publish_versions(adapter, table, df)
+    _save_manifest(adapter, table, _manifest_frame(table, df), versions, manifest_dir)
+    return versions['']
+
+
+def format_change_report(report):
+    return (
+        f"{report['table']} -> {report['target']}: {report['inserted']:,} inserted, {report['updated']:,} updated, "
+        f"{report['deleted']:,} deleted, {report['unchanged']:,} unchanged in {report['seconds']:.2f}s "
+        f"(version {report['version']})"
+    )
@@ -0,0 +1,25 @@
+"""
+connection.py
+
+Synopsis:
+----------
+Opens Snowflake connections from the SNOWFLAKE_* environment variables shared by the ingestion scripts
+and the app.
+
+Functions:
+    - connect_snowflake(): Returns a new snowflake.connector connection.
+"""
+
+import os
+
+
+def connect_snowflake():
+    import snowflake.connector
+    return snowflake.connector.connect(
+        user=os.environ['SNOWFLAKE_USER'],
+        password=os.environ['SNOWFLAKE_PASSWORD'],
+        account=os.environ['SNOWFLAKE_ACCOUNT'],
+        warehouse=os.environ['SNOWFLAKE_WAREHOUSE'],
+        database=os.environ['SNOWFLAKE_DATABASE'],
+        schema=os.environ['SNOWFLAKE_SCHEMA']
+    )
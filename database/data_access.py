@@ -0,0 +1,256 @@
+"""
+data_access.py
+
+Synopsis:
+----------
+Data-access layer for the app. cultural_sites and tourism_stats are served from local Parquet snapshots
+under data/snapshots/, so starting a worker does not need a warehouse round trip. A snapshot older than
+its TTL is refreshed incrementally: only rows whose updated_at is at or after the snapshot watermark are
+fetched and merged on the natural keys, and a row-count check falls back to a full reload when rows were
+deleted upstream. The refresh path reuses one connection per process, and drops it when a query fails.
+
+The ingestion scripts publish a content version per table to data_versions (change_data.py). A caller that
+passes the published version gets the snapshot refreshed as soon as it differs, without waiting for the TTL,
+and a refresh whose merged result does not hash to the published version (rows deleted and inserted in the
+same run) is redone as a full reload.
+
+If the source is unavailable (or BHARATVERSE_OFFLINE=1) the last snapshot is served as-is, and without a
+snapshot the tables are built straight from data/*.csv.
+
+Settings (environment variables):
+    - BHARATVERSE_DATA_SOURCE: 'snowflake' (default), 'sqlite' (local database from ingest.py) or 'csv'.
+    - BHARATVERSE_SNAPSHOT_DIR: Snapshot directory (default data/snapshots).
+    - BHARATVERSE_SNAPSHOT_TTL: Seconds before a snapshot is refreshed (default 3600).
+    - BHARATVERSE_OFFLINE: '1' to never contact the source.
+    - BHARATVERSE_VERSION_POLL: Seconds between checks of the published data versions (default 30).
+
+Functions:
+    - get_connection(): Returns the shared source connection, reconnecting if it was closed.
+    - published_versions(offline=OFFLINE): Returns the published {table: {partition: version}}, or {} if unavailable.
+    - refresh_table(table, full=False, version=None): Refreshes one snapshot from the source and returns it.
+    - load_table(table, ttl=SNAPSHOT_TTL, offline=OFFLINE, version=None): Returns one table, refreshing it if stale.
+    - load_tables(ttl=SNAPSHOT_TTL, offline=OFFLINE, versions=None): Returns (df_sites, df_trends) for the app.
+    - load_published_tables(ttl=SNAPSHOT_TTL, offline=OFFLINE): load_tables() at the currently published versions.
+    - load_forecasts(ttl=SNAPSHOT_TTL, offline=OFFLINE): Returns the materialized tourism_forecasts, or None.
+    - snapshot_info(): Returns the snapshot metadata (fetch time, watermark, rows, source) per table.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from database.change_data import PARTITION_COLUMNS, content_versions
+from database.ingest import DEFAULT_SQLITE_PATH, TABLES, migrate_sqlite, prepare_cultural_sites, prepare_tourism_stats
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+DATA_SOURCE = os.environ.get('BHARATVERSE_DATA_SOURCE', 'snowflake')
+SNAPSHOT_DIR = os.environ.get('BHARATVERSE_SNAPSHOT_DIR', os.path.join(DATA_DIR, 'snapshots'))
+SNAPSHOT_TTL = float(os.environ.get('BHARATVERSE_SNAPSHOT_TTL', 3600))
+OFFLINE = os.environ.get('BHARATVERSE_OFFLINE') == '1'
+VERSION_POLL = float(os.environ.get('BHARATVERSE_VERSION_POLL', 30))
+META_FILE = 'snapshots.json'
+
+CSV_FILES = {
+    'cultural_sites': ('cultural_sites.csv', prepare_cultural_sites),
+    'tourism_stats': ('tourism_stats.csv', prepare_tourism_stats),
+}
+
+_connection = None
+_connection_lock = threading.Lock()
+_meta_lock = threading.Lock()
+
+
+def _connect():
+    if DATA_SOURCE == 'snowflake':
+        from database.connection import connect_snowflake
+        return connect_snowflake()
+    if DATA_SOURCE == 'sqlite':
+        # Streamlit runs reruns on different threads; access is serialised by _connection_lock
+        conn = sqlite3.connect(os.environ.get('BHARATVERSE_SQLITE_PATH', DEFAULT_SQLITE_PATH), check_same_thread=False)
+        migrate_sqlite(conn)
+        return conn
+    raise ValueError(f"Data source '{DATA_SOURCE}' has no connection, expected 'snowflake' or 'sqlite'")
+
+
+def get_connection():
+    global _connection
+    if _connection is None or getattr(_connection, 'is_closed', lambda: False)():
+        _connection = _connect()
+    return _connection
+
+
+def _reset_connection():
+    global _connection
+    connection, _connection = _connection, None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            logger.debug('Closing the %s connection failed', DATA_SOURCE, exc_info=True)
+
+
+def _read_sql(sql, params=None):
+    try:
+        df = pd.read_sql(sql, get_connection(), params=params)
+    except Exception:
+        # The connection may be broken (dropped session, expired token); the next query opens a fresh one
+        _reset_connection()
+        raise
+    df.columns = [c.upper() for c in df.columns]
+    return df
+
+
+def _placeholder():
+    return '?' if DATA_SOURCE == 'sqlite' else '%s'
+
+
+def _snapshot_path(table):
+    return os.path.join(SNAPSHOT_DIR, f'{table}.parquet')
+
+
+def _read_meta():
+    path = os.path.join(SNAPSHOT_DIR, META_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_snapshot(table, df, watermark, version=None):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp_path = f'{_snapshot_path(table)}.{os.getpid()}.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, _snapshot_path(table))
+    with _meta_lock:
+        meta = _read_meta()
+        meta[table] = {'fetched_at': time.time(), 'watermark': watermark, 'rows': len(df), 'source': DATA_SOURCE,
+                       'version': version}
+        tmp_meta = os.path.join(SNAPSHOT_DIR, f'{META_FILE}.{os.getpid()}.tmp')
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_meta, os.path.join(SNAPSHOT_DIR, META_FILE))
+
+
+def snapshot_info():
+    return _read_meta()
+
+
+def published_versions(offline=OFFLINE):
+    if DATA_SOURCE == 'csv' or offline:
+        return {}
+    try:
+        with _connection_lock:
+            df = _read_sql('SELECT table_name, partition_key, version FROM data_versions')
+    except Exception:
+        # Nothing published yet (or the source is down): callers fall back to the snapshot TTL
+        logger.debug('No published data versions from %s', DATA_SOURCE, exc_info=True)
+        return {}
+    versions = {}
+    for table, partition, version in df[['TABLE_NAME', 'PARTITION_KEY', 'VERSION']].itertuples(index=False):
+        # Snowflake may hand back the empty partition key as NULL
+        versions.setdefault(table, {})[partition or ''] = version
+    return versions
+
+
+def _content_version(table, df):
+    return content_versions(table, df)[''] if table in PARTITION_COLUMNS else None
+
+
+def refresh_table(table, full=False, version=None):
+    columns = TABLES[table]['columns'] + ['updated_at']
+    keys = [k.upper() for k in TABLES[table]['keys']]
+    select = f"SELECT {', '.join(columns)} FROM {table}"
+    watermark = _read_meta().get(table, {}).get('watermark')
+    snapshot_exists = os.path.exists(_snapshot_path(table))
+
+    with _connection_lock:
+        if full or watermark is None or not snapshot_exists:
+            df = _read_sql(select)
+        else:
+            # >= rather than > so rows written in the same instant as the watermark are not missed
+            delta = _read_sql(f'{select} WHERE updated_at >= {_placeholder()}', params=(watermark,))
+            df = pd.concat([pd.read_parquet(_snapshot_path(table)), delta], ignore_index=True)
+            df = df.drop_duplicates(subset=keys, keep='last').reset_index(drop=True)
+            remote_rows = int(_read_sql(f'SELECT COUNT(*) AS row_count FROM {table}').iloc[0, 0])
+            if remote_rows != len(df):
+                logger.info('%s: %d rows upstream vs %d in snapshot, reloading in full', table, remote_rows, len(df))
+                df = _read_sql(select)
+            elif version is not None and _content_version(table, df) != version:
+                logger.info('%s: snapshot does not match published version %s, reloading in full', table, version)
+                df = _read_sql(select)
+
+    new_watermark = str(df['UPDATED_AT'].max()) if len(df) and df['UPDATED_AT'].notna().any() else None
+    _write_snapshot(table, df, new_watermark, _content_version(table, df))
+    return df
+
+
+def _from_csv(table):
+    file_name, prepare = CSV_FILES[table]
+    df = prepare(pd.read_csv(os.path.join(DATA_DIR, file_name)))
+    df.columns = [c.upper() for c in df.columns]
+    return df
+
+
+def load_table(table, ttl=SNAPSHOT_TTL, offline=OFFLINE, version=None):
+    public = [c.upper() for c in TABLES[table]['columns']]
+    if DATA_SOURCE == 'csv':
+        return _from_csv(table)
+
+    info = _read_meta().get(table)
+    stale = (
+        info is None or not os.path.exists(_snapshot_path(table)) or time.time() - info['fetched_at'] > ttl
+        or (version is not None and info.get('version') != version)
+    )
+    if stale and not offline:
+        try:
+            return refresh_table(table, version=version)[public]
+        except Exception:
+            logger.warning('Refreshing %s from %s failed, serving the local copy', table, DATA_SOURCE, exc_info=True)
+
+    if os.path.exists(_snapshot_path(table)):
+        return pd.read_parquet(_snapshot_path(table))[public]
+    return _from_csv(table)
+
+
+def load_tables(ttl=SNAPSHOT_TTL, offline=OFFLINE, versions=None):
+    versions = versions or {}
+    return (
+        load_table('cultural_sites', ttl, offline, versions.get('cultural_sites')),
+        load_table('tourism_stats', ttl, offline, versions.get('tourism_stats'))
+    )
+
+
+def load_published_tables(ttl=SNAPSHOT_TTL, offline=OFFLINE):
+    versions = published_versions(offline)
+    return load_tables(ttl, offline, {table: partitions.get('') for table, partitions in versions.items()})
+
+
+def _table_exists(table):
+    try:
+        with _connection_lock:
+            _read_sql(f'SELECT 1 FROM {table} WHERE 1 = 0')
+        return True
+    except Exception:
+        logger.debug('%s is not available from %s', table, DATA_SOURCE, exc_info=True)
+        return False
+
+
+def load_forecasts(ttl=SNAPSHOT_TTL, offline=OFFLINE):
+    # Optional table: without it (CSV mode, never materialized) the app forecasts live
+    if DATA_SOURCE == 'csv':
+        return None
+    if not os.path.exists(_snapshot_path('tourism_forecasts')) and (offline or not _table_exists('tourism_forecasts')):
+        # Checked up front, so a table that was never created is not logged as a failed refresh every TTL
+        return None
+    try:
+        return load_table('tourism_forecasts', ttl, offline)
+    except KeyError:
+        # Neither the source nor a snapshot had the table, and there is no CSV to fall back to
+        return None
@@ -0,0 +1,292 @@
+"""
+ingest.py
+
+Synopsis:
+----------
+Shared bulk ingestion for the cultural_sites and tourism_stats tables (and the derived tourism_forecasts and
+data_versions tables, see materialize_forecasts.py and change_data.py). Rows are written in chunks and upserted
+on each table's natural key (site_name + state, state + year), so re-running an ingestion updates existing rows
+instead of duplicating them. Every chunk is one bulk load instead of one network round trip per row.
+
+The database is reached through an adapter with a small common interface, so the same pipeline runs
+against Snowflake or, offline, against a local SQLite file:
+    - SnowflakeAdapter: loads each chunk into a temporary staging table (executemany multi-row INSERT,
+      or write_pandas, which PUTs a staged file and runs COPY INTO) and MERGEs it into the target.
+    - SQLiteAdapter: INSERT ... ON CONFLICT DO UPDATE against UNIQUE natural keys.
+Both adapters also delete rows by natural key (delete(table, keys_df)) for change-data ingestion.
+
+Functions:
+    - prepare_cultural_sites(df): Cleans and orders the cultural_sites columns.
+    - prepare_tourism_stats(df): Casts and orders the tourism_stats columns.
+    - ingest(adapter, table, df, chunk_size=DEFAULT_CHUNK_SIZE): Upserts df in chunks and returns a throughput report.
+    - format_report(report): One-line summary of an ingest report.
+    - make_adapter(target, sqlite_path=None, method='executemany'): Builds the adapter for a CLI --target.
+    - read_table(adapter, table): Reads a whole table through an adapter's connection.
+    - migrate_sqlite(conn): Adds updated_at to SQLite tables created before it existed.
+"""
+
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 10_000
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'local.db')
+
+TABLES = {
+    'cultural_sites': {
+        'columns': ['site_name', 'state', 'art_form', 'seasonality', 'responsible_score',
+                    'latitude', 'longitude', 'image_url', 'describtion'],
+        'keys': ['site_name', 'state'],
+    },
+    'tourism_stats': {
+        'columns': ['state', 'year', 'domestic_arrivals'],
+        'keys': ['state', 'year'],
+    },
+    'tourism_forecasts': {
+        'columns': ['state', 'year', 'forecast', 'lower', 'upper', 'confidence', 'history_hash'],
+        'keys': ['state', 'year'],
+    },
+    'data_versions': {
+        'columns': ['table_name', 'partition_key', 'version', 'row_count'],
+        'keys': ['table_name', 'partition_key'],
+    },
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cultural_sites (
+    site_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site_name TEXT,
+    state TEXT,
+    art_form TEXT,
+    seasonality TEXT,
+    responsible_score REAL,
+    latitude REAL,
+    longitude REAL,
+    image_url TEXT,
+    describtion TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (site_name, state)
+);
+
+CREATE TABLE IF NOT EXISTS tourism_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    state TEXT,
+    year INTEGER,
+    domestic_arrivals INTEGER,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (state, year)
+);
+
+CREATE TABLE IF NOT EXISTS tourism_forecasts (
+    state TEXT,
+    year INTEGER,
+    forecast REAL,
+    lower REAL,
+    upper REAL,
+    confidence REAL,
+    history_hash TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (state, year)
+);
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name TEXT,
+    partition_key TEXT,
+    version TEXT,
+    row_count INTEGER,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (table_name, partition_key)
+);
+"""
+
+
+def prepare_cultural_sites(df):
+    df = df.copy()
+    df.columns = [c.lower() for c in df.columns]
+    # Clean the description column: replace commas with spaces and strip extra spaces
+    df['describtion'] = (
+        df['describtion'].astype(str)
+        .str.replace(',', ' ', regex=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+    for column in ('responsible_score', 'latitude', 'longitude'):
+        df[column] = df[column].astype(float)
+    return df[TABLES['cultural_sites']['columns']]
+
+
+def prepare_tourism_stats(df):
+    df = df.copy()
+    df.columns = [c.lower() for c in df.columns]
+    df['year'] = df['year'].astype(int)
+    df['domestic_arrivals'] = df['domestic_arrivals'].astype('int64')
+    return df[TABLES['tourism_stats']['columns']]
+
+
+def migrate_sqlite(conn):
+    # Databases created before updated_at existed; ADD COLUMN cannot take a CURRENT_TIMESTAMP default
+    for table in TABLES:
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        # An empty column set means the table does not exist in this database (yet)
+        if columns and 'updated_at' not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN updated_at TEXT')
+            conn.execute(f'UPDATE {table} SET updated_at = CURRENT_TIMESTAMP')
+    conn.commit()
+
+
+def _records(df):
+    # Plain Python values (int/float/str/None); database drivers do not accept numpy scalars
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+class SQLiteAdapter:
+    name = 'sqlite'
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SQLITE_SCHEMA)
+        migrate_sqlite(self.conn)
+
+    def upsert(self, table, df):
+        spec = TABLES[table]
+        columns, keys = spec['columns'], spec['keys']
+        values = [c for c in columns if c not in keys]
+        updates = ', '.join(f'{c} = excluded.{c}' for c in values)
+        changed = ' OR '.join(f'{c} IS NOT excluded.{c}' for c in values)
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE {changed}",
+            _records(df[columns])
+        )
+        self.conn.commit()
+
+    def delete(self, table, keys_df):
+        keys = TABLES[table]['keys']
+        self.conn.executemany(
+            f"DELETE FROM {table} WHERE {' AND '.join(f'{k} = ?' for k in keys)}",
+            _records(keys_df[keys])
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class SnowflakeAdapter:
+    name = 'snowflake'
+
+    def __init__(self, conn=None, method='executemany'):
+        if method not in ('executemany', 'write_pandas'):
+            raise ValueError(f"Unknown load method '{method}', expected 'executemany' or 'write_pandas'")
+        if conn is None:
+            from database.connection import connect_snowflake
+            conn = connect_snowflake()
+        self.conn = conn
+        self.method = method
+        self.cursor = conn.cursor()
+        self._staged = set()
+
+    def _stage(self, table):
+        stage = f'{table}_stage'
+        if table not in self._staged:
+            columns = ', '.join(TABLES[table]['columns'])
+            self.cursor.execute(
+                f'CREATE OR REPLACE TEMPORARY TABLE {stage} AS SELECT {columns} FROM {table} WHERE FALSE'
+            )
+            self._staged.add(table)
+        return stage
+
+    def upsert(self, table, df):
+        spec = TABLES[table]
+        columns, keys = spec['columns'], spec['keys']
+        stage = self._stage(table)
+        if self.method == 'write_pandas':
+            from snowflake.connector.pandas_tools import write_pandas
+            staged = df[columns].copy()
+            staged.columns = [c.upper() for c in columns]
+            write_pandas(self.conn, staged, stage.upper(), auto_create_table=False)
+        else:
+            self.cursor.executemany(
+                f"INSERT INTO {stage} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                _records(df[columns])
+            )
+        values = [c for c in columns if c not in keys]
+        on = ' AND '.join(f't.{k} = s.{k}' for k in keys)
+        updates = ', '.join(f't.{c} = s.{c}' for c in values)
+        changed = ' OR '.join(f't.{c} IS DISTINCT FROM s.{c}' for c in values)
+        # Unchanged rows are left alone so updated_at stays a usable watermark for data_access.py
+        self.cursor.execute(
+            f"MERGE INTO {table} t USING {stage} s ON {on} "
+            f"WHEN MATCHED AND ({changed}) THEN UPDATE SET {updates}, t.updated_at = CURRENT_TIMESTAMP() "
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}, updated_at) "
+            f"VALUES ({', '.join('s.' + c for c in columns)}, CURRENT_TIMESTAMP())"
+        )
+        self.cursor.execute(f'TRUNCATE TABLE {stage}')
+
+    def delete(self, table, keys_df):
+        keys = TABLES[table]['keys']
+        stage = f'{table}_delete_stage'
+        if stage not in self._staged:
+            self.cursor.execute(
+                f"CREATE OR REPLACE TEMPORARY TABLE {stage} AS SELECT {', '.join(keys)} FROM {table} WHERE FALSE"
+            )
+            self._staged.add(stage)
+        self.cursor.executemany(
+            f"INSERT INTO {stage} ({', '.join(keys)}) VALUES ({', '.join(['%s'] * len(keys))})",
+            _records(keys_df[keys])
+        )
+        on = ' AND '.join(f't.{k} = s.{k}' for k in keys)
+        self.cursor.execute(f'DELETE FROM {table} t USING {stage} s WHERE {on}')
+        self.cursor.execute(f'TRUNCATE TABLE {stage}')
+
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
+
+def make_adapter(target, sqlite_path=None, method='executemany'):
+    if target == 'sqlite':
+        return SQLiteAdapter(sqlite_path or DEFAULT_SQLITE_PATH)
+    if target == 'snowflake':
+        return SnowflakeAdapter(method=method)
+    raise ValueError(f"Unknown ingestion target '{target}', expected 'snowflake' or 'sqlite'")
+
+
+def read_table(adapter, table):
+    columns = TABLES[table]['columns']
+    df = pd.read_sql(f"SELECT {', '.join(columns)} FROM {table}", adapter.conn)
+    df.columns = [c.lower() for c in df.columns]
+    return df
+
+
+def ingest(adapter, table, df, chunk_size=DEFAULT_CHUNK_SIZE):
+    keys = TABLES[table]['keys']
+    start = time.perf_counter()
+    rows = chunks = 0
+    for offset in range(0, len(df), chunk_size):
+        # Duplicate natural keys inside one chunk would make MERGE ambiguous; the last row wins
+        chunk = df.iloc[offset:offset + chunk_size].drop_duplicates(subset=keys, keep='last')
+        adapter.upsert(table, chunk)
+        rows += len(chunk)
+        chunks += 1
+    seconds = time.perf_counter() - start
+    return {
+        'table': table,
+        'target': adapter.name,
+        'rows': rows,
+        'chunks': chunks,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else float('inf'),
+    }
+
+
+def format_report(report):
+    rejected = f", {report['rejected']:,} rejected" if report.get('rejected') else ''
+    return (
+        f"{report['table']} -> {report['target']}: {report['rows']:,} rows in {report['chunks']} chunk(s){rejected}, "
+        f"{report['seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/s)"
+    )
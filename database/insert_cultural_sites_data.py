@@ -1,7 +1,14 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
-import snowflake.connector
 #from dotenv import load_dotenv
-import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.ingest import DEFAULT_CHUNK_SIZE, format_report, make_adapter, prepare_cultural_sites
+from database.change_data import format_change_report, ingest_changes, sync_manifest
+from database.streaming import stream_ingest
 
 # Load environment variables from .env file
 #load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', 'pass.env'))
@@ -9,48 +16,37 @@ import os
 # Use relative path (recommended)
 csv_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'cultural_sites.csv')
 
-# Load the CSV file
-df = pd.read_csv(csv_file)
-
-# Clean the description column: replace commas with spaces and strip extra spaces
-df['describtion'] = df['describtion'].astype(str).str.replace(',', ' ', regex=False).str.replace('\s+', ' ', regex=True).str.strip()
-
-# Connect to Snowflake
-conn = snowflake.connector.connect(
-    user=os.environ['SNOWFLAKE_USER'],
-    password=os.environ['SNOWFLAKE_PASSWORD'],
-    account=os.environ['SNOWFLAKE_ACCOUNT'],
-    warehouse=os.environ['SNOWFLAKE_WAREHOUSE'],
-    database=os.environ['SNOWFLAKE_DATABASE'],
-    schema=os.environ['SNOWFLAKE_SCHEMA']
-)
-
-cursor = conn.cursor()
-
-# Insert each row into the table (with description)
-for _, row in df.iterrows():
-    cursor.execute("""
-        INSERT INTO cultural_sites 
-        (site_name, state, art_form, seasonality, responsible_score, latitude, longitude, image_url, describtion)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """,
-        (
-            row['site_name'],
-            row['state'],
-            row['art_form'],
-            row['seasonality'],
-            float(row['responsible_score']),
-            float(row['latitude']),
-            float(row['longitude']),
-            row['image_url'],
-            row['describtion']
-        )
-    )
-
-
-cursor.close()
-conn.close()
-
-print("✅ Data inserted successfully into cultural_sites table.")
-
 
+def main():
+    parser = argparse.ArgumentParser(description='Upsert data/cultural_sites.csv into the cultural_sites table.')
+    parser.add_argument('--csv', default=csv_file)
+    parser.add_argument('--target', choices=['snowflake', 'sqlite'], default='snowflake')
+    parser.add_argument('--sqlite-path', help='Local database file for --target sqlite.')
+    parser.add_argument('--method', choices=['executemany', 'write_pandas'], default='executemany')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--stream', action='store_true',
+                        help='Read, validate and write the CSV chunk by chunk in bounded memory.')
+    parser.add_argument('--reject-file', help='With --stream: CSV that receives rows failing validation.')
+    parser.add_argument('--rescan', action='store_true',
+                        help='Diff against the table itself instead of the manifest of the last ingestion.')
+    args = parser.parse_args()
+
+    adapter = make_adapter(args.target, args.sqlite_path, args.method)
+    try:
+        if args.stream:
+            # Streamed loads only upsert; the manifest and version tokens are rebuilt from the table afterwards
+            report = stream_ingest(adapter, 'cultural_sites', args.csv, args.chunk_size, args.reject_file)
+            sync_manifest(adapter, 'cultural_sites')
+            summary = format_report(report)
+        else:
+            # Load the CSV file and clean the description column
+            df = prepare_cultural_sites(pd.read_csv(args.csv))
+            summary = format_change_report(ingest_changes(adapter, 'cultural_sites', df, args.chunk_size, args.rescan))
+    finally:
+        adapter.close()
+
+    print(f"✅ Data upserted successfully into cultural_sites table. {summary}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,15 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
-import snowflake.connector
 #from dotenv import load_dotenv
-import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.ingest import DEFAULT_CHUNK_SIZE, format_report, make_adapter, prepare_tourism_stats
+from database.materialize_forecasts import format_materialize_report, materialize_forecasts
+from database.change_data import format_change_report, ingest_changes, sync_manifest
+from database.streaming import stream_ingest
 
 # Load environment variables from .env file
 #load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', 'pass.env'))
@@ -9,31 +17,43 @@ import os
 # Use relative path (recommended)
 csv_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'tourism_stats.csv')
 
-# Load the CSV file
-df = pd.read_csv(csv_file)
-
-# Connect to Snowflake
-conn = snowflake.connector.connect(
-    user=os.environ['SNOWFLAKE_USER'],
-    password=os.environ['SNOWFLAKE_PASSWORD'],
-    account=os.environ['SNOWFLAKE_ACCOUNT'],
-    warehouse=os.environ['SNOWFLAKE_WAREHOUSE'],
-    database=os.environ['SNOWFLAKE_DATABASE'],
-    schema=os.environ['SNOWFLAKE_SCHEMA']
-)
-cursor = conn.cursor()
-
-# Insert each row
-for _, row in df.iterrows():
-    cursor.execute(
-        """
-        INSERT INTO tourism_stats (state, year, domestic_arrivals)
-        VALUES (%s, %s, %s)
-        """,
-        (row['state'], int(row['year']), int(row['domestic_arrivals']))
-    )
-
-cursor.close()
-conn.close()
-
-print("✅ Data inserted successfully into tourism_stats table.")
+
+def main():
+    parser = argparse.ArgumentParser(description='Upsert data/tourism_stats.csv into the tourism_stats table.')
+    parser.add_argument('--csv', default=csv_file)
+    parser.add_argument('--target', choices=['snowflake', 'sqlite'], default='snowflake')
+    parser.add_argument('--sqlite-path', help='Local database file for --target sqlite.')
+    parser.add_argument('--method', choices=['executemany', 'write_pandas'], default='executemany')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--stream', action='store_true',
+                        help='Read, validate and write the CSV chunk by chunk in bounded memory.')
+    parser.add_argument('--reject-file', help='With --stream: CSV that receives rows failing validation.')
+    parser.add_argument('--rescan', action='store_true',
+                        help='Diff against the table itself instead of the manifest of the last ingestion.')
+    parser.add_argument('--aggregate', action='store_true',
+                        help='With --stream: sum finer-grained rows (e.g. monthly/district) per state and year.')
+    parser.add_argument('--no-materialize', action='store_true',
+                        help='Skip refreshing tourism_forecasts for the states whose history changed.')
+    args = parser.parse_args()
+
+    adapter = make_adapter(args.target, args.sqlite_path, args.method)
+    try:
+        if args.stream:
+            # Streamed loads only upsert; the manifest and version tokens are rebuilt from the table afterwards
+            report = stream_ingest(adapter, 'tourism_stats', args.csv, args.chunk_size, args.reject_file,
+                                   aggregate=args.aggregate)
+            sync_manifest(adapter, 'tourism_stats')
+            summary = format_report(report)
+        else:
+            # Load the CSV file
+            df = prepare_tourism_stats(pd.read_csv(args.csv))
+            summary = format_change_report(ingest_changes(adapter, 'tourism_stats', df, args.chunk_size, args.rescan))
+        print(f"✅ Data upserted successfully into tourism_stats table. {summary}")
+        if not args.no_materialize:
+            print(f"✅ {format_materialize_report(materialize_forecasts(adapter))}")
+    finally:
+        adapter.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+materialize_forecasts.py
+
+Synopsis:
+----------
+Materializes tourism forecasts into the tourism_forecasts table, so the app reads one precomputed row instead
+of fitting a trend per request. Every state's history in tourism_stats is hashed (trend_predictor.history_hashes);
+a state is recomputed only when its hash, the confidence level or any horizon year differs from what is
+stored, and all recomputed states are fitted in one vectorized TrendForecaster pass and upserted through the
+same adapters as the ingestion scripts (Snowflake or the local SQLite stand-in). Forecasts of states that no
+longer have any history are deleted.
+
+insert_tourism_stats_data.py runs this after every ingestion; run it directly to change the horizon or level,
+or with --full to recompute everything.
+
+Functions:
+    - stale_states(df_stats, df_forecasts, years=FORECAST_YEARS, level=FORECAST_LEVEL): States to recompute.
+    - materialize_forecasts(adapter, years=FORECAST_YEARS, level=FORECAST_LEVEL, full=False): Refreshes the table.
+    - format_materialize_report(report): One-line summary of a materialization.
+
+Usage:
+    python database/materialize_forecasts.py --target sqlite
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.ingest import DEFAULT_CHUNK_SIZE, ingest, make_adapter, read_table
+from model.trend_predictor import FORECAST_LEVEL, FORECAST_YEARS, TrendForecaster, history_hashes
+
+
+def _upper(df):
+    df = df.copy()
+    df.columns = [c.upper() for c in df.columns]
+    return df
+
+
+def stale_states(df_stats, df_forecasts, years=FORECAST_YEARS, level=FORECAST_LEVEL):
+    hashes = history_hashes(df_stats)
+    if df_forecasts is None or df_forecasts.empty:
+        return hashes.index.tolist()
+    stored = df_forecasts[df_forecasts['YEAR'].astype(np.int64).isin(list(years))]
+    up_to_date = (
+        (stored['HISTORY_HASH'].to_numpy() == stored['STATE'].map(hashes).to_numpy())
+        & np.isclose(stored['CONFIDENCE'].astype(np.float64), level)
+    )
+    # Fresh only if every horizon year is stored with the current hash and level
+    fresh_years = stored[up_to_date].groupby('STATE')['YEAR'].nunique()
+    fresh = set(fresh_years[fresh_years == len(set(years))].index)
+    return [state for state in hashes.index if state not in fresh]
+
+
+def materialize_forecasts(adapter, years=FORECAST_YEARS, level=FORECAST_LEVEL, full=False,
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+    start = time.perf_counter()
+    df_stats = _upper(read_table(adapter, 'tourism_stats'))
+    stored = _upper(read_table(adapter, 'tourism_forecasts'))
+    states = stale_states(df_stats, None if full else stored, years, level)
+
+    orphaned = stored.loc[~stored['STATE'].isin(df_stats['STATE'].unique()), ['STATE', 'YEAR']]
+    if len(orphaned):
+        orphaned.columns = ['state', 'year']
+        adapter.delete('tourism_forecasts', orphaned)
+
+    rows = 0
+    if states:
+        history = df_stats[df_stats['STATE'].isin(states)]
+        table = TrendForecaster.fit(history).forecast_table(years, level)
+        table['HISTORY_HASH'] = table['STATE'].map(history_hashes(history))
+        table.columns = [c.lower() for c in table.columns]
+        rows = ingest(adapter, 'tourism_forecasts', table, chunk_size)['rows']
+    return {
+        'target': adapter.name,
+        'states': int(df_stats['STATE'].nunique()),
+        'recomputed': len(states),
+        'rows': rows,
+        'deleted': len(orphaned),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def format_materialize_report(report):
+    return (
+        f"tourism_forecasts -> {report['target']}: {report['recomputed']} of {report['states']} state(s) recomputed, "
+        f"{report['rows']:,} rows written, {report['deleted']:,} deleted in {report['seconds']:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialize tourism forecasts for every state into tourism_forecasts.')
+    parser.add_argument('--target', choices=['snowflake', 'sqlite'], default='snowflake')
+    parser.add_argument('--sqlite-path', help='Local database file for --target sqlite.')
+    parser.add_argument('--years', type=int, nargs=2, metavar=('FIRST', 'LAST'),
+                        default=(FORECAST_YEARS[0], FORECAST_YEARS[-1]))
+    parser.add_argument('--level', type=float, default=FORECAST_LEVEL, help='Prediction interval level.')
+    parser.add_argument('--full', action='store_true', help='Recompute every state, not only changed ones.')
+    args = parser.parse_args()
+
+    adapter = make_adapter(args.target, args.sqlite_path)
+    try:
+        years = tuple(range(args.years[0], args.years[1] + 1))
+        report = materialize_forecasts(adapter, years, args.level, args.full)
+    finally:
+        adapter.close()
+    print(f'✅ {format_materialize_report(report)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,14 @@ USE SCHEMA CULTURAL_SCHEMA;
 USE WAREHOUSE CULTURAL_WH;
 
 
+-- Natural keys used by the MERGE upserts in database/ingest.py:
+--   tourism_stats (state, year), cultural_sites (site_name, state)
 CREATE TABLE tourism_stats (
     id INT AUTOINCREMENT PRIMARY KEY,
     state STRING,
     year INT,
-    domestic_arrivals INT
+    domestic_arrivals INT,
+    updated_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
 );
 
 CREATE OR REPLACE TABLE cultural_sites (
@@ -20,7 +23,41 @@ CREATE OR REPLACE TABLE cultural_sites (
     latitude FLOAT,
     longitude FLOAT,
     image_url STRING,
-    describtion STRING
+    describtion STRING,
+    updated_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
 );
 
+-- Forecasts materialized from tourism_stats after each ingestion (database/materialize_forecasts.py).
+-- history_hash is a content hash of the state's yearly history, so only changed states are recomputed
+-- and readers can tell whether a row still matches the current history.
+CREATE TABLE IF NOT EXISTS tourism_forecasts (
+    state STRING,
+    year INT,
+    forecast FLOAT,
+    lower FLOAT,
+    upper FLOAT,
+    confidence FLOAT,
+    history_hash STRING,
+    updated_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    PRIMARY KEY (state, year)
+);
+
+-- Content version tokens published after every change-data ingestion (database/change_data.py): one row per
+-- table (partition_key '') and one per art form / state. The app polls them to invalidate only what changed.
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name STRING,
+    partition_key STRING,
+    version STRING,
+    row_count INT,
+    updated_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    PRIMARY KEY (table_name, partition_key)
+);
+
+-- updated_at is the watermark for incremental snapshot refreshes (database/data_access.py).
+-- Migration for tables created before it existed (ADD COLUMN cannot take a CURRENT_TIMESTAMP default):
+-- ALTER TABLE tourism_stats ADD COLUMN updated_at TIMESTAMP_NTZ;
+-- UPDATE tourism_stats SET updated_at = CURRENT_TIMESTAMP();
+-- ALTER TABLE cultural_sites ADD COLUMN updated_at TIMESTAMP_NTZ;
+-- UPDATE cultural_sites SET updated_at = CURRENT_TIMESTAMP();
+
 SELECT * FROM cultural_sites;
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+streaming.py
+
+Synopsis:
+----------
+Streaming ingestion for source CSVs that are too large to load in one go. The file is read in bounded
+chunks with explicit dtypes, every chunk is validated (finite numbers, lat/lon ranges, responsible score
+0-10, integral years, non-negative arrivals, required names), rows that fail are appended to a reject CSV
+with the reason, and clean chunks are upserted through the adapters in ingest.py.
+
+Parsing and database writes are pipelined: a reader thread parses and validates the next chunks into a
+small bounded queue while the main thread writes the current one, so peak memory is a few chunks no matter
+how large the file is. For tourism feeds at a finer grain than the table (e.g. monthly, district-level
+extracts) `aggregate=True` sums arrivals per (state, year) across all chunks and upserts the totals once.
+
+Functions:
+    - read_chunks(path, table, chunk_size): Yields raw chunks with only the table's columns, as strings.
+    - validate_chunk(table, chunk): Returns (clean rows, rejected rows with a reject_reason column).
+    - stream_ingest(adapter, table, path, chunk_size=..., reject_path=None, aggregate=False, queue_size=2):
+      Streams a CSV into a table and returns an ingest report with row and reject counts.
+"""
+
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from database.ingest import DEFAULT_CHUNK_SIZE, TABLES, prepare_cultural_sites, prepare_tourism_stats
+
+PREPARE = {
+    'cultural_sites': prepare_cultural_sites,
+    'tourism_stats': prepare_tourism_stats,
+}
+NUMERIC_COLUMNS = {
+    'cultural_sites': ['responsible_score', 'latitude', 'longitude'],
+    'tourism_stats': ['year', 'domestic_arrivals'],
+}
+REQUIRED_TEXT = {
+    'cultural_sites': ['site_name', 'state'],
+    'tourism_stats': ['state'],
+}
+_DONE = object()
+
+
+def read_chunks(path, table, chunk_size=DEFAULT_CHUNK_SIZE):
+    wanted = set(TABLES[table]['columns'])
+    # Everything is read as text and converted in validate_chunk, so one bad cell rejects a row, not the file
+    reader = pd.read_csv(
+        path,
+        chunksize=chunk_size,
+        usecols=lambda c: c.strip().lower() in wanted,
+        dtype=str,
+        keep_default_na=False,
+    )
+    for chunk in reader:
+        chunk.columns = [c.strip().lower() for c in chunk.columns]
+        yield chunk
+
+
+def validate_chunk(table, chunk):
+    reasons = pd.Series('', index=chunk.index, dtype=object)
+
+    def flag(mask, reason):
+        reasons[mask & (reasons == '')] = reason
+
+    for column in TABLES[table]['columns']:
+        if column not in chunk.columns:
+            raise ValueError(f"Source file is missing column '{column}' required by {table}")
+    for column in REQUIRED_TEXT[table]:
+        flag(chunk[column].str.strip() == '', f'missing {column}')
+
+    numbers = {c: pd.to_numeric(chunk[c], errors='coerce') for c in NUMERIC_COLUMNS[table]}
+    for column, values in numbers.items():
+        flag(values.isna(), f'{column} is not a number')
+        flag(~np.isfinite(values.astype(float)), f'{column} is not finite')
+
+    if table == 'cultural_sites':
+        flag(~numbers['latitude'].between(-90, 90), 'latitude out of range')
+        flag(~numbers['longitude'].between(-180, 180), 'longitude out of range')
+        flag(~numbers['responsible_score'].between(0, 10), 'responsible_score out of range 0-10')
+    else:
+        flag(numbers['year'] != np.floor(numbers['year']), 'year is not an integer')
+        flag(numbers['domestic_arrivals'] < 0, 'domestic_arrivals is negative')
+        flag(numbers['domestic_arrivals'] != np.floor(numbers['domestic_arrivals']), 'domestic_arrivals is not an integer')
+
+    bad = reasons != ''
+    clean = chunk[~bad].copy()
+    for column, values in numbers.items():
+        clean[column] = values[~bad]
+    rejects = chunk[bad].assign(reject_reason=reasons[bad])
+    return PREPARE[table](clean), rejects
+
+
+def _reader(path, table, chunk_size, out, stop):
+    try:
+        for chunk in read_chunks(path, table, chunk_size):
+            if stop.is_set():
+                return
+            out.put(validate_chunk(table, chunk))
+        out.put(_DONE)
+    except Exception as exc:
+        out.put(exc)
+
+
+def stream_ingest(adapter, table, path, chunk_size=DEFAULT_CHUNK_SIZE, reject_path=None,
+                  aggregate=False, queue_size=2):
+    keys = TABLES[table]['keys']
+    if aggregate and table != 'tourism_stats':
+        raise ValueError('aggregate=True is only supported for tourism_stats')
+    if reject_path and os.path.exists(reject_path):
+        os.remove(reject_path)
+
+    start = time.perf_counter()
+    chunks = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    reader = threading.Thread(target=_reader, args=(path, table, chunk_size, chunks, stop), daemon=True)
+    reader.start()
+
+    rows = rejected = written_chunks = 0
+    totals = None
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            clean, rejects = item
+            rows += len(clean)
+            if len(rejects):
+                rejected += len(rejects)
+                if reject_path:
+                    rejects.to_csv(reject_path, mode='a', header=not os.path.exists(reject_path), index=False)
+            if aggregate:
+                # Running per-key totals stay as small as the number of (state, year) pairs
+                partial = clean.groupby(keys)['domestic_arrivals'].sum()
+                totals = partial if totals is None else totals.add(partial, fill_value=0)
+            elif len(clean):
+                adapter.upsert(table, clean.drop_duplicates(subset=keys, keep='last'))
+                written_chunks += 1
+    finally:
+        stop.set()
+        # Unblock the reader if it is waiting on a full queue
+        while reader.is_alive():
+            try:
+                chunks.get_nowait()
+            except queue.Empty:
+                reader.join(timeout=0.1)
+
+    if aggregate and totals is not None:
+        adapter.upsert(table, totals.astype('int64').reset_index()[TABLES[table]['columns']])
+        written_chunks += 1
+
+    seconds = time.perf_counter() - start
+    return {
+        'table': table,
+        'target': adapter.name,
+        'rows': rows,
+        'rejected': rejected,
+        'chunks': written_chunks,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else float('inf'),
+    }
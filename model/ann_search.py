@@ -0,0 +1,179 @@
+"""
+ann_search.py
+
+Synopsis:
+----------
+This module provides the search backends used by the embedding index. The exact backend scans every row
+with one matrix-vector product; the IVF backend (inverted file, a locally trained k-means coarse quantizer)
+only scores the rows in the `nprobe` clusters closest to the query (more when those hold fewer than k rows),
+trading a little recall for latency on large catalogs. Small catalogs always use the exact scan.
+
+Knobs (environment variables):
+    - BHARATVERSE_ANN_BACKEND: 'auto' (default), 'exact' or 'ivf'.
+    - BHARATVERSE_ANN_EXACT_MAX_ROWS: 'auto' uses the exact scan up to this many rows (default 50000).
+    - BHARATVERSE_ANN_NLIST: Number of IVF clusters (default sqrt of the row count).
+    - BHARATVERSE_ANN_NPROBE: Clusters scanned per query; higher means better recall, more latency (default 8).
+
+Classes:
+    - ExactSearch: Brute-force cosine scan.
+    - IVFSearch: Inverted-file approximate nearest neighbour search.
+
+Functions:
+    - top_k(scores, k): Returns the positions of the k largest scores, best first.
+    - default_nlist(rows): Number of IVF clusters for a matrix with the given row count.
+    - train_centroids(matrix, nlist, iterations=10, seed=0): Spherical k-means over a sample of rows.
+    - make_searcher(matrix, backend=None, cache_path=None, fingerprint=None): Picks and builds a backend.
+"""
+
+import os
+
+import numpy as np
+
+ANN_BACKEND = os.environ.get('BHARATVERSE_ANN_BACKEND', 'auto')
+ANN_EXACT_MAX_ROWS = int(os.environ.get('BHARATVERSE_ANN_EXACT_MAX_ROWS', 50_000))
+ANN_NLIST = int(os.environ.get('BHARATVERSE_ANN_NLIST', 0))
+ANN_NPROBE = int(os.environ.get('BHARATVERSE_ANN_NPROBE', 8))
+
+ASSIGN_CHUNK_ROWS = 65_536
+BATCH_SCORE_ELEMENTS = 1 << 26
+
+
+def default_nlist(rows):
+    return min(rows, ANN_NLIST or max(1, int(np.sqrt(rows))))
+
+
+def top_k(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def _nearest_centroid(matrix, centroids):
+    # Chunked so the (rows x nlist) score block stays bounded for million-row matrices
+    assign = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), ASSIGN_CHUNK_ROWS):
+        block = np.asarray(matrix[start:start + ASSIGN_CHUNK_ROWS])
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def train_centroids(matrix, nlist, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    n = len(matrix)
+    sample_size = min(n, max(nlist * 40, 10_000))
+    sample = np.asarray(matrix[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assign, kind='stable')
+        clusters, starts = np.unique(assign[order], return_index=True)
+        centroids[clusters] = np.add.reduceat(sample[order], starts, axis=0)
+        # Re-seed empty clusters from random sample rows
+        empty = np.setdiff1d(np.arange(nlist), clusters)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+class ExactSearch:
+    name = 'exact'
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def search(self, query, k):
+        scores = self.matrix @ query
+        top = top_k(scores, k)
+        return top, scores[top]
+
+    def search_batch(self, queries, k):
+        # One matrix multiply per block of queries, sized so the score block stays around 256 MB
+        results = []
+        step = max(1, BATCH_SCORE_ELEMENTS // max(len(self.matrix), 1))
+        for start in range(0, len(queries), step):
+            scores = queries[start:start + step] @ self.matrix.T
+            for row in scores:
+                top = top_k(row, k)
+                results.append((top, row[top]))
+        return results
+
+
+class IVFSearch:
+    name = 'ivf'
+
+    def __init__(self, matrix, centroids, order, offsets, nprobe=ANN_NPROBE):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, matrix, nlist=None, nprobe=ANN_NPROBE, iterations=10, seed=0):
+        nlist = min(len(matrix), nlist or default_nlist(len(matrix)))
+        centroids = train_centroids(matrix, nlist, iterations, seed)
+        assign = _nearest_centroid(matrix, centroids)
+        # Inverted lists in CSR form: rows of cluster c are order[offsets[c]:offsets[c + 1]]
+        order = np.argsort(assign, kind='stable').astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+        return cls(matrix, centroids, order, offsets, nprobe)
+
+    @classmethod
+    def load(cls, matrix, path, fingerprint, nprobe=ANN_NPROBE):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as saved:
+            stale = (
+                str(saved['fingerprint']) != fingerprint
+                or int(saved['rows']) != len(matrix)
+                or len(saved['centroids']) != default_nlist(len(matrix))
+            )
+            if stale:
+                return None
+            return cls(matrix, saved['centroids'], saved['order'], saved['offsets'], nprobe)
+
+    def save(self, path, fingerprint):
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(
+            tmp_path, centroids=self.centroids, order=self.order, offsets=self.offsets,
+            fingerprint=np.array(fingerprint), rows=np.array(len(self.matrix))
+        )
+        os.replace(tmp_path, path)
+
+    def search(self, query, k, nprobe=None):
+        ranked = np.argsort(-(self.centroids @ query), kind='stable')
+        # Probe more clusters when the nearest ones hold fewer than k rows, so k results always come back
+        sizes = np.cumsum(np.diff(self.offsets)[ranked])
+        needed = int(np.searchsorted(sizes, min(k, len(self.matrix)))) + 1
+        probes = ranked[:min(max(nprobe or self.nprobe, needed), len(self.centroids))]
+        candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probes])
+        candidates.sort()
+        scores = self.matrix[candidates] @ query
+        top = top_k(scores, k)
+        return candidates[top], scores[top]
+
+    def search_batch(self, queries, k, nprobe=None):
+        return [self.search(query, k, nprobe) for query in queries]
+
+
+def make_searcher(matrix, backend=None, cache_path=None, fingerprint=None):
+    backend = backend or ANN_BACKEND
+    if backend == 'auto':
+        backend = 'exact' if len(matrix) <= ANN_EXACT_MAX_ROWS else 'ivf'
+    if backend == 'exact' or len(matrix) == 0:
+        return ExactSearch(matrix)
+    if backend != 'ivf':
+        raise ValueError(f"Unknown ANN backend '{backend}', expected 'auto', 'exact' or 'ivf'")
+
+    if cache_path is not None:
+        searcher = IVFSearch.load(matrix, cache_path, fingerprint)
+        if searcher is not None:
+            return searcher
+    searcher = IVFSearch.build(matrix)
+    if cache_path is not None:
+        searcher.save(cache_path, fingerprint)
+    return searcher
@@ -0,0 +1,115 @@
+"""
+backtest.py
+
+Synopsis:
+----------
+This module provides a rolling-origin backtesting harness for the forecasting models in forecast_models.py.
+For every state it repeatedly trains on the years up to an origin and scores the forecast of the following
+`horizon` years, moving the origin forward one year at a time. States are evaluated in parallel with a
+process pool, and the report gives MAPE per state and model, the best model per state, and the time spent
+fitting each model.
+
+Functions:
+    - backtest_state(years, values, models, horizon=1, min_train=3, mask_years=None): Scores one series.
+    - run_backtest(df, models=None, horizon=1, min_train=3, mask_years=None, workers=None): Scores every state.
+
+Usage:
+    python -m model.backtest --mask-years 2020 2021 --workers 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model.forecast_models import COVID_YEARS, MODELS, fit_model
+
+
+def backtest_state(years, values, models, horizon=1, min_train=3, mask_years=None):
+    order = np.argsort(years, kind='stable')
+    years = np.asarray(years, dtype=np.float64)[order]
+    values = np.asarray(values, dtype=np.float64)[order]
+    results = {}
+    for name in models:
+        errors = []
+        start = time.perf_counter()
+        for origin in range(min_train, len(years) - horizon + 1):
+            predict = fit_model(name, years[:origin], values[:origin], mask_years)
+            actual = values[origin:origin + horizon]
+            predicted = predict(years[origin:origin + horizon])
+            nonzero = actual != 0
+            errors.extend(np.abs((actual[nonzero] - predicted[nonzero]) / actual[nonzero]))
+        results[name] = {
+            'mape': float(np.mean(errors) * 100) if errors else np.nan,
+            'seconds': time.perf_counter() - start,
+            'forecasts': len(errors),
+        }
+    return results
+
+
+def _backtest_chunk(chunk, models, horizon, min_train, mask_years):
+    return [
+        (state, backtest_state(years, values, models, horizon, min_train, mask_years))
+        for state, years, values in chunk
+    ]
+
+
+def run_backtest(df, models=None, horizon=1, min_train=3, mask_years=None, workers=None):
+    models = list(models or MODELS)
+    series = [
+        (state, group['YEAR'].to_numpy(), group['DOMESTIC_ARRIVALS'].to_numpy())
+        for state, group in df.groupby('STATE', sort=True)
+    ]
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1 or len(series) <= 1:
+        rows = _backtest_chunk(series, models, horizon, min_train, mask_years)
+    else:
+        # A few chunks per worker keeps the pool busy without pickling one task per state
+        chunks = [series[i::workers * 4] for i in range(min(len(series), workers * 4))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_backtest_chunk, c, models, horizon, min_train, mask_years) for c in chunks]
+            rows = [row for future in futures for row in future.result()]
+    wall_seconds = time.perf_counter() - start
+
+    mape = pd.DataFrame(
+        {state: {name: scores[name]['mape'] for name in models} for state, scores in rows}
+    ).T.sort_index()
+    mape.index.name = 'STATE'
+    timings = pd.DataFrame({
+        'fit_seconds': {name: sum(scores[name]['seconds'] for _, scores in rows) for name in models},
+        'mean_mape': mape.mean(),
+    })
+    # States where every model failed to score have no best model
+    best = mape.dropna(how='all').idxmin(axis=1).reindex(mape.index).rename('BEST_MODEL')
+    return {'mape': mape, 'best': best, 'timings': timings, 'wall_seconds': wall_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling-origin backtest of the tourism forecasting models.')
+    parser.add_argument('--csv', default=os.path.join(os.path.dirname(__file__), '..', 'data', 'tourism_stats.csv'))
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--horizon', type=int, default=1)
+    parser.add_argument('--min-train', type=int, default=3)
+    parser.add_argument('--mask-years', type=int, nargs='*', default=None,
+                        help=f'Years left out of training (e.g. {" ".join(map(str, COVID_YEARS))}).')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    df.columns = [c.upper() for c in df.columns]
+    report = run_backtest(df, args.models, args.horizon, args.min_train, args.mask_years, args.workers)
+
+    pd.set_option('display.width', 160)
+    print('MAPE (%) per state and model:')
+    print(report['mape'].round(2).join(report['best']))
+    print('\nPer model:')
+    print(report['timings'].round(4))
+    print(f"\nWall-clock: {report['wall_seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+compact_catalog.py
+
+Synopsis:
+----------
+This module provides an array-backed view of the sites DataFrame for ranking code that scores every row in
+one NumPy pass. String columns used for filtering (STATE, ART_FORM, SEASONALITY) are stored as integer codes
+with a lookup table, RESPONSIBLE_SCORE as a float32 array, and the description embeddings as the row-aligned
+matrix of the persisted embedding index.
+
+compact_frame() applies the same idea to the DataFrames every worker keeps in memory: repeated strings become
+categoricals (one copy of each distinct value plus small integer codes), floats become float32 and integers
+are downcast. The embedding matrix is never copied into the frame or the catalog; it stays a read-only mmap
+of embeddings.npy, so its pages live once in the OS page cache and are shared by every worker process.
+
+Classes:
+    - CompactCatalog: Integer-coded, float32 arrays plus the embedding matrix for one version of the sites data.
+
+Functions:
+    - compact_frame(df, category_max_ratio=0.5): Returns a copy of df with dictionary-encoded strings and narrow numbers.
+    - get_compact_catalog(df, data_version=None, with_embeddings=True): Returns the cached CompactCatalog.
+"""
+
+import numpy as np
+import pandas as pd
+
+from model.fingerprint import frame_identity
+from model.instrumentation import register_cache, timed
+from model.lru_cache import TTLCache
+
+CODED_COLUMNS = ('STATE', 'ART_FORM', 'SEASONALITY')
+# Compared against user-chosen thresholds (e.g. 8.7), so kept exact rather than rounded to float32
+EXACT_COLUMNS = ('RESPONSIBLE_SCORE',)
+CATEGORY_MAX_RATIO = 0.5
+
+_catalogs = register_cache('compact_catalogs', TTLCache(maxsize=8, ttl=None))
+
+
+class CompactCatalog:
+    def __init__(self, df, embeddings=None):
+        # Rows without a description cannot be matched semantically (same rule as recommend_by_interest)
+        self.df = df.dropna(subset=['DESCRIBTION'])
+        self.scores = self.df['RESPONSIBLE_SCORE'].to_numpy(dtype=np.float32)
+        self.codes = {}
+        self.values = {}
+        for column in CODED_COLUMNS:
+            codes, values = pd.factorize(self.df[column])
+            dtype = np.int16 if len(values) < np.iinfo(np.int16).max else np.int32
+            self.codes[column] = codes.astype(dtype)
+            self.values[column] = pd.Index(values)
+        self.embeddings = embeddings
+
+    def __len__(self):
+        return len(self.df)
+
+    def code_of(self, column, value):
+        position = self.values[column].get_indexer([value])[0]
+        # Unknown values must not match missing ones, which factorize codes as -1
+        return int(position) if position >= 0 else -2
+
+    def mask(self, **filters):
+        """Boolean row mask for equality filters on the coded columns; None values are ignored."""
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in filters.items():
+            if value is not None:
+                mask &= self.codes[column.upper()] == self.code_of(column.upper(), value)
+        return mask
+
+
+def compact_frame(df, category_max_ratio=CATEGORY_MAX_RATIO):
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            pass
+        elif pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+            # Only worth it when values repeat; a column of unique descriptions would just gain codes
+            if series.nunique() <= max(1, category_max_ratio * len(series)):
+                series = series.astype('category')
+        elif pd.api.types.is_float_dtype(series.dtype) and column not in EXACT_COLUMNS:
+            series = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            series = pd.to_numeric(series, downcast='integer')
+        columns[column] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def get_compact_catalog(df, data_version=None, with_embeddings=True):
+    # Without a version the catalog is cached per DataFrame object; hashing the frame would cost more than a ranking
+    key = (data_version or frame_identity(df), with_embeddings)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with timed('compact_catalog_build'):
+            catalog = CompactCatalog(df)
+        if with_embeddings:
+            from model.personalised_recommender import get_index
+            catalog.embeddings = get_index(catalog.df['DESCRIBTION'], data_version).matrix
+        _catalogs.put(key, catalog)
+    return catalog
@@ -0,0 +1,270 @@
+"""
+embedding_index.py
+
+Synopsis:
+----------
+This module maintains a persisted embedding index of site descriptions for the interest recommender.
+Descriptions are encoded once in batches, L2-normalised and stored on disk as a float32 matrix that is
+memory-mapped on load. Every row is keyed by a content hash of its description, so syncing the index
+against a new set of descriptions only re-encodes the rows that are new or have changed.
+A query then costs one encode plus a single matrix-vector product with an argpartition top-k, or, on
+catalogs above the exact-search threshold, an IVF probe of the nearest clusters (see ann_search.py).
+
+Every worker shares the index directory. A save writes keys, matrix and metadata into a new version
+directory and then atomically replaces the CURRENT pointer file, so a concurrent load sees either the old
+or the new index, never the new matrix with the old keys.
+
+Classes:
+    - EmbeddingIndex: Loads, syncs, saves and searches the on-disk index.
+
+Functions:
+    - description_keys(descriptions): Returns a uint64 content hash for every description.
+    - clean_descriptions(descriptions): Applies the same cleanup as the ingestion scripts.
+
+Usage:
+    python -m model.embedding_index --csv data/cultural_sites.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from model.ann_search import make_searcher
+from model.instrumentation import timed
+
+DEFAULT_INDEX_DIR = os.environ.get(
+    'BHARATVERSE_INDEX_DIR',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'index')
+)
+MATRIX_FILE = 'embeddings.npy'
+KEYS_FILE = 'keys.npy'
+META_FILE = 'meta.json'
+IVF_FILE = 'ivf.npz'
+POINTER_FILE = 'CURRENT'
+VERSION_PREFIX = 'v-'
+# Older versions are removed only after this long, so a concurrent save or load never loses its files
+VERSION_GRACE_SECONDS = 60
+
+
+def description_keys(descriptions):
+    values = pd.Series(descriptions, dtype=object).astype(str)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def clean_descriptions(descriptions):
+    # Same cleanup as database/ingest.prepare_cultural_sites so hashes match the Snowflake text
+    return (
+        pd.Series(descriptions).astype(str)
+        .str.replace(',', ' ', regex=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _current_version_dir(index_dir):
+    try:
+        with open(os.path.join(index_dir, POINTER_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(index_dir, version) if version else None
+
+
+class EmbeddingIndex:
+    """Row-aligned, content-addressed embedding matrix for a list of descriptions."""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, model_name=None, backend=None):
+        self.index_dir = index_dir
+        self.model_name = model_name
+        self.backend = backend
+        self._searcher = None
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.last_sync = {'reused': 0, 'encoded': 0, 'seconds': 0.0}
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def fingerprint(self):
+        return hashlib.sha1(self.keys.tobytes()).hexdigest()
+
+    @classmethod
+    def load(cls, index_dir=DEFAULT_INDEX_DIR, model_name=None, backend=None):
+        index = cls(index_dir, model_name, backend)
+        # A save may drop the version we were pointed at between reading the pointer and the files; retry once
+        for _ in range(2):
+            version_dir = _current_version_dir(index_dir)
+            if version_dir is None:
+                return index
+            try:
+                with open(os.path.join(version_dir, META_FILE)) as f:
+                    meta = json.load(f)
+                # Vectors from a different encoder are not comparable, start from scratch
+                if model_name is not None and meta.get('model_name') != model_name:
+                    return index
+                keys = np.load(os.path.join(version_dir, KEYS_FILE))
+                matrix = np.load(os.path.join(version_dir, MATRIX_FILE), mmap_mode='r')
+            except FileNotFoundError:
+                continue
+            if len(keys) != matrix.shape[0]:
+                return index
+            index.keys, index.matrix = keys, matrix
+            return index
+        return index
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        version = f'{VERSION_PREFIX}{time.time_ns()}-{os.getpid()}'
+        version_dir = os.path.join(self.index_dir, version)
+        os.makedirs(version_dir)
+        np.save(os.path.join(version_dir, KEYS_FILE), np.ascontiguousarray(self.keys))
+        np.save(os.path.join(version_dir, MATRIX_FILE), np.ascontiguousarray(self.matrix))
+        meta = {
+            'model_name': self.model_name,
+            'rows': int(len(self.keys)),
+            'dim': int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0,
+        }
+        with open(os.path.join(version_dir, META_FILE), 'w') as f:
+            json.dump(meta, f)
+
+        # Swapping the pointer publishes keys, matrix and meta together
+        previous = _current_version_dir(self.index_dir)
+        tmp_pointer = os.path.join(self.index_dir, f'{POINTER_FILE}.{os.getpid()}.tmp')
+        with open(tmp_pointer, 'w') as f:
+            f.write(version)
+        os.replace(tmp_pointer, os.path.join(self.index_dir, POINTER_FILE))
+        keep = {version, os.path.basename(previous) if previous else None}
+        for name in os.listdir(self.index_dir):
+            path = os.path.join(self.index_dir, name)
+            if name.startswith(VERSION_PREFIX) and name not in keep:
+                try:
+                    if time.time() - os.path.getmtime(path) < VERSION_GRACE_SECONDS:
+                        continue
+                except FileNotFoundError:
+                    continue
+                # Workers still mapping these files keep their pages until they unmap them
+                shutil.rmtree(path, ignore_errors=True)
+
+        self.matrix = np.load(os.path.join(version_dir, MATRIX_FILE), mmap_mode='r')
+        self._searcher = None
+
+    @timed('index_sync')
+    def sync(self, descriptions, encoder, batch_size=64, persist=True):
+        """Aligns the index with `descriptions`, encoding only unseen descriptions."""
+        start = time.perf_counter()
+        descriptions = pd.Series(descriptions, dtype=object).astype(str).reset_index(drop=True)
+        keys = description_keys(descriptions)
+        if len(keys) == len(self.keys) and np.array_equal(keys, self.keys):
+            self.last_sync = {'reused': len(keys), 'encoded': 0, 'seconds': time.perf_counter() - start}
+            return False
+
+        # Map every known key to its current row, then gather reusable rows in the new order
+        known = pd.Series(np.arange(len(self.keys)), index=self.keys)
+        known = known[~known.index.duplicated()]
+        rows = known.reindex(keys).to_numpy()
+        missing = np.isnan(rows)
+
+        dim = self.matrix.shape[1] if len(self.keys) else None
+        new_vectors = None
+        if missing.any():
+            new_vectors = _normalize(encoder.encode(
+                descriptions[missing].tolist(),
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ))
+            dim = new_vectors.shape[1]
+
+        matrix = np.empty((len(keys), dim or 0), dtype=np.float32)
+        if (~missing).any():
+            matrix[~missing] = self.matrix[rows[~missing].astype(np.int64)]
+        if new_vectors is not None:
+            matrix[missing] = new_vectors
+
+        self.keys = keys
+        self.matrix = matrix
+        self._searcher = None
+        if persist:
+            self.save()
+        self.last_sync = {
+            'reused': int((~missing).sum()),
+            'encoded': int(missing.sum()),
+            'seconds': time.perf_counter() - start,
+        }
+        return True
+
+    def search(self, query_vector, top_k=2):
+        """Returns (rows, scores) of the top_k rows by cosine similarity, best first."""
+        if len(self.keys) == 0 or top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = _normalize(np.asarray(query_vector).reshape(-1))
+        return self.searcher().search(query, top_k)
+
+    def search_batch(self, query_matrix, top_k=2):
+        """Returns one (rows, scores) pair per query row, scored together where the backend allows."""
+        queries = _normalize(np.atleast_2d(query_matrix))
+        if len(self.keys) == 0 or top_k <= 0:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return [empty] * len(queries)
+        return self.searcher().search_batch(queries, top_k)
+
+    def snapshot(self):
+        """Returns a copy sharing this index's arrays and searcher that later syncs do not change."""
+        frozen = EmbeddingIndex(self.index_dir, self.model_name, self.backend)
+        frozen.keys, frozen.matrix = self.keys, self.matrix
+        frozen._searcher = self.searcher()
+        frozen.last_sync = dict(self.last_sync)
+        return frozen
+
+    def searcher(self):
+        if self._searcher is None:
+            persisted = os.path.exists(os.path.join(self.index_dir, POINTER_FILE))
+            self._searcher = make_searcher(
+                self.matrix,
+                backend=self.backend,
+                cache_path=os.path.join(self.index_dir, IVF_FILE) if persisted else None,
+                fingerprint=self.fingerprint
+            )
+        return self._searcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the persisted site description embedding index.')
+    parser.add_argument('--csv', default=os.path.join(os.path.dirname(__file__), '..', 'data', 'cultural_sites.csv'))
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--full', action='store_true', help='Discard the existing index and re-encode every row.')
+    args = parser.parse_args()
+
+    from model.personalised_recommender import INDEX_NAME, get_model
+
+    df = pd.read_csv(args.csv)
+    column = 'describtion' if 'describtion' in df.columns else 'DESCRIBTION'
+    descriptions = clean_descriptions(df[column].dropna())
+
+    if args.full:
+        index = EmbeddingIndex(args.index_dir, INDEX_NAME)
+    else:
+        index = EmbeddingIndex.load(args.index_dir, INDEX_NAME)
+    index.sync(descriptions, get_model(), batch_size=args.batch_size)
+    stats = index.last_sync
+    print(f"✅ Index at {args.index_dir}: {len(index)} rows "
+          f"({stats['encoded']} encoded, {stats['reused']} reused) in {stats['seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
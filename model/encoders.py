@@ -0,0 +1,279 @@
+"""
+encoders.py
+
+Synopsis:
+----------
+This module loads the sentence encoder used by the interest recommender, with CPU-oriented alternatives to
+the reference PyTorch SentenceTransformer. Every backend exposes the same encode(sentences, batch_size, ...)
+call and returns L2-normalised float32 vectors, so the embedding index and the query cache do not care which
+one is active. Each backend keeps its own persisted index (see index_name), since vectors from different
+backends are close but not identical.
+
+Backends (BHARATVERSE_ENCODER):
+    - torch: The reference SentenceTransformer('all-MiniLM-L6-v2') (default).
+    - torch-int8: The same model with its Linear layers dynamically quantized to int8 by PyTorch.
+    - onnx: The transformer exported to ONNX and run by ONNX Runtime, without importing torch.
+    - onnx-int8: The ONNX export with int8 dynamically quantized weights (smallest and fastest on CPU).
+
+The ONNX backends read an offline export (python -m model.encoders export) holding model.onnx,
+model_int8.onnx, tokenizer.json and encoder.json, and only need onnxruntime and tokenizers at serving time.
+Before switching a deployment, `python -m model.encoders parity --backend onnx-int8` checks that rankings on
+data/cultural_sites.csv match the reference model within tolerance.
+
+Settings (environment variables):
+    - BHARATVERSE_ENCODER: Backend name (default 'torch').
+    - BHARATVERSE_ONNX_DIR: Directory of the ONNX export (default data/encoders/all-MiniLM-L6-v2).
+    - BHARATVERSE_ONNX_THREADS: ONNX Runtime intra-op threads (default 0, the runtime's choice).
+
+Classes:
+    - OnnxEncoder: Tokenizer + ONNX Runtime session + mean pooling.
+
+Functions:
+    - index_name(backend=ENCODER, model_name=MODEL_NAME): Name of the embedding index for a backend.
+    - load_encoder(backend=ENCODER, model_name=MODEL_NAME): Loads the encoder of a backend.
+    - export_onnx(output_dir=ONNX_DIR, model_name=MODEL_NAME, quantize=True): Writes the ONNX export.
+    - parity_report(candidate, reference, descriptions, queries, top_k=5): Compares two encoders' rankings.
+
+Usage:
+    python -m model.encoders export
+    python -m model.encoders parity --backend onnx-int8
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+ENCODER = os.environ.get('BHARATVERSE_ENCODER', 'torch')
+ONNX_DIR = os.environ.get(
+    'BHARATVERSE_ONNX_DIR',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'encoders', MODEL_NAME)
+)
+ONNX_THREADS = int(os.environ.get('BHARATVERSE_ONNX_THREADS', 0))
+
+BACKENDS = ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+ONNX_FILES = {'onnx': 'model.onnx', 'onnx-int8': 'model_int8.onnx'}
+TOKENIZER_FILE = 'tokenizer.json'
+META_FILE = 'encoder.json'
+
+# Parity tolerances against the reference model
+PARITY_MIN_COSINE = 0.98
+PARITY_MIN_OVERLAP = 0.8
+PARITY_QUERIES = [
+    "I'm fascinated by ancient temples and folk music",
+    'Love vibrant festivals and art villages',
+    'handloom weaving and traditional textiles',
+    'classical dance performances in historic temples',
+    'desert forts, puppetry and camel fairs',
+    'tribal crafts and masks in the mountains',
+    'spiritual retreats and monasteries in the Himalayas',
+    'boat races and backwater festivals',
+    'painting, murals and rock-cut caves',
+    'street food and bustling local markets',
+]
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class OnnxEncoder:
+    """Runs an exported transformer with ONNX Runtime and mean-pools its token embeddings."""
+
+    def __init__(self, model_dir=ONNX_DIR, quantized=True, threads=ONNX_THREADS):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, ONNX_FILES['onnx-int8' if quantized else 'onnx'])
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX export at {model_path}, run 'python -m model.encoders export' first"
+            )
+        with open(os.path.join(model_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.max_seq_length = self.meta['max_seq_length']
+        self.pad_id = self.meta['pad_id']
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.max_seq_length)
+        self.tokenizer.no_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _encode_batch(self, encodings):
+        width = max(len(e.ids) for e in encodings)
+        ids = np.full((len(encodings), width), self.pad_id, dtype=np.int64)
+        mask = np.zeros((len(encodings), width), dtype=np.int64)
+        types = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            length = len(encoding.ids)
+            ids[row, :length] = encoding.ids
+            mask[row, :length] = encoding.attention_mask
+            types[row, :length] = encoding.type_ids
+        feeds = {'input_ids': ids, 'attention_mask': mask, 'token_type_ids': types}
+        hidden = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+        # Mean over real tokens, as the model's sentence-transformers Pooling layer does
+        weights = mask[:, :, None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+
+    def encode(self, sentences, batch_size=64, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else [str(s) for s in sentences]
+        if not texts:
+            return np.empty((0, self.meta['dim']), dtype=np.float32)
+        encodings = self.tokenizer.encode_batch(texts)
+        # Batch similar lengths together so little compute goes to padding
+        order = np.argsort([-len(e.ids) for e in encodings], kind='stable')
+        vectors = np.empty((len(texts), self.meta['dim']), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            vectors[rows] = self._encode_batch([encodings[i] for i in rows])
+        if self.meta.get('normalize', True):
+            vectors = _normalize(vectors)
+        return vectors[0] if single else vectors
+
+
+def index_name(backend=ENCODER, model_name=MODEL_NAME):
+    # The reference backend keeps the original index name, so existing indexes stay valid
+    return model_name if backend == 'torch' else f'{model_name}+{backend}'
+
+
+def load_encoder(backend=ENCODER, model_name=MODEL_NAME):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}', expected one of {list(BACKENDS)}")
+    if backend in ONNX_FILES:
+        return OnnxEncoder(ONNX_DIR, quantized=backend == 'onnx-int8')
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device='cpu' if backend == 'torch-int8' else None)
+    if backend == 'torch-int8':
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def export_onnx(output_dir=ONNX_DIR, model_name=MODEL_NAME, quantize=True):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device='cpu')
+    pooling = model[1].get_config_dict()
+    if not pooling.get('pooling_mode_mean_tokens'):
+        raise ValueError(f"'{model_name}' does not use mean pooling, which is all OnnxEncoder implements")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = tokenizer(['ancient temples and folk music'], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']}
+    model_path = os.path.join(output_dir, ONNX_FILES['onnx'])
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer, tuple(sample[name] for name in input_names), model_path,
+            input_names=input_names, output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes, opset_version=14, do_constant_folding=True
+        )
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+    meta = {
+        'model_name': model_name,
+        'max_seq_length': int(model.max_seq_length),
+        'dim': int(model.get_sentence_embedding_dimension()),
+        'pad_id': int(tokenizer.pad_token_id or 0),
+        'normalize': any(type(module).__name__ == 'Normalize' for module in model),
+    }
+    with open(os.path.join(output_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    written = [model_path]
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = os.path.join(output_dir, ONNX_FILES['onnx-int8'])
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        written.append(int8_path)
+    return written
+
+
+def parity_report(candidate, reference, descriptions, queries, top_k=5):
+    """Embedding cosine and top-k ranking agreement of `candidate` against `reference`."""
+    descriptions, queries = list(descriptions), list(queries)
+    ref_docs = _normalize(reference.encode(descriptions, batch_size=64, convert_to_numpy=True))
+    cand_docs = _normalize(candidate.encode(descriptions, batch_size=64, convert_to_numpy=True))
+    ref_queries = _normalize(reference.encode(queries, batch_size=64, convert_to_numpy=True))
+    cand_queries = _normalize(candidate.encode(queries, batch_size=64, convert_to_numpy=True))
+
+    doc_cosine = (ref_docs * cand_docs).sum(axis=1)
+    query_cosine = (ref_queries * cand_queries).sum(axis=1)
+    # Each side ranks with its own document vectors, as it would with its own index
+    ref_scores = ref_queries @ ref_docs.T
+    cand_scores = cand_queries @ cand_docs.T
+    k = min(top_k, len(descriptions))
+    ref_top = np.argsort(-ref_scores, axis=1, kind='stable')[:, :k]
+    cand_top = np.argsort(-cand_scores, axis=1, kind='stable')[:, :k]
+    overlap = np.array([len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)])
+    return {
+        'descriptions': len(descriptions),
+        'queries': len(queries),
+        'top_k': k,
+        'min_cosine': float(min(doc_cosine.min(), query_cosine.min())),
+        'mean_cosine': float(np.concatenate([doc_cosine, query_cosine]).mean()),
+        'mean_overlap': float(overlap.mean()),
+        'min_overlap': float(overlap.min()),
+        'top1_agreement': float((ref_top[:, 0] == cand_top[:, 0]).mean()),
+        'max_score_diff': float(np.abs(ref_scores - cand_scores).max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the ONNX encoder or check a backend against the reference.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Export the transformer to ONNX (and an int8 variant).')
+    export.add_argument('--output-dir', default=ONNX_DIR)
+    export.add_argument('--model-name', default=MODEL_NAME)
+    export.add_argument('--no-quantize', action='store_true', help='Skip writing model_int8.onnx.')
+
+    parity = commands.add_parser('parity', help='Compare a backend against the reference torch model.')
+    parity.add_argument('--backend', choices=BACKENDS, default='onnx-int8')
+    parity.add_argument('--reference', choices=BACKENDS, default='torch')
+    parity.add_argument('--csv', default=os.path.join(os.path.dirname(__file__), '..', 'data', 'cultural_sites.csv'))
+    parity.add_argument('--top-k', type=int, default=5)
+    parity.add_argument('--min-cosine', type=float, default=PARITY_MIN_COSINE)
+    parity.add_argument('--min-overlap', type=float, default=PARITY_MIN_OVERLAP)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        for path in export_onnx(args.output_dir, args.model_name, quantize=not args.no_quantize):
+            print(f'✅ Wrote {path} ({os.path.getsize(path) / 2 ** 20:.1f} MB)')
+        return
+
+    from model.embedding_index import clean_descriptions
+
+    df = pd.read_csv(args.csv)
+    df.columns = [c.upper() for c in df.columns]
+    descriptions = clean_descriptions(df['DESCRIBTION'].dropna())
+    # Free-text interests plus every art form, the two kinds of query the app receives
+    queries = PARITY_QUERIES + sorted(df['ART_FORM'].dropna().unique())
+    report = parity_report(load_encoder(args.backend), load_encoder(args.reference), descriptions, queries, args.top_k)
+    print(f'{args.backend} vs {args.reference} on {report["descriptions"]} descriptions, {report["queries"]} queries')
+    for name, value in report.items():
+        print(f'    {name:<16} {value:.4f}' if isinstance(value, float) else f'    {name:<16} {value}')
+    passed = report['min_cosine'] >= args.min_cosine and report['mean_overlap'] >= args.min_overlap
+    print('✅ Within tolerance' if passed else
+          f'❌ Outside tolerance (min cosine >= {args.min_cosine}, mean top-{report["top_k"]} overlap >= {args.min_overlap})')
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+fingerprint.py
+
+Synopsis:
+----------
+This module computes content fingerprints of DataFrames. Caches across the model layer key their entries on
+these fingerprints, so a cached result is reused exactly as long as the underlying data is unchanged,
+regardless of which DataFrame object (or copy) it arrives in.
+
+Hashing every column costs a full pass over the data, which is more than most cached lookups save, so callers
+that are not given a data version key on frame_identity() instead: a token that stays the same for as long as
+the same DataFrame object is alive. A frame modified in place keeps its token; pass a data version for those.
+
+Functions:
+    - frame_fingerprint(df, columns=None): Returns a hex digest of the values of the given columns.
+    - frame_identity(df): Returns a token unique to this DataFrame object while it is alive.
+"""
+
+import hashlib
+import itertools
+import threading
+import weakref
+
+import pandas as pd
+
+_identities = {}
+_identity_counter = itertools.count()
+_identity_lock = threading.Lock()
+
+
+def frame_fingerprint(df, columns=None):
+    if columns is not None:
+        df = df[list(columns)]
+    digest = hashlib.sha1(','.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _forget(key, ref):
+    with _identity_lock:
+        # The id may already belong to a newer frame; only drop the entry of the frame that died
+        if _identities.get(key, (None,))[0] is ref:
+            del _identities[key]
+
+
+def frame_identity(df):
+    key = id(df)
+    with _identity_lock:
+        entry = _identities.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        token = f'frame-{next(_identity_counter)}'
+        _identities[key] = (weakref.ref(df, lambda ref: _forget(key, ref)), token)
+        return token
@@ -0,0 +1,130 @@
+"""
+forecast_models.py
+
+Synopsis:
+----------
+This module holds the registry of tourism forecasting models that can be compared by the backtesting
+harness (see backtest.py). Every model fits one state's yearly series and forecasts arbitrary future years.
+Any model can be combined with outlier-year masking, which drops years such as the 2020-2021 COVID collapse
+from the training data so they do not drag the fitted trend down.
+
+Models:
+    - linear: Ordinary least-squares line (the model used by trend_predictor.py).
+    - huber: Robust line fitted by iteratively reweighted least squares with Huber weights.
+    - log_linear: Least-squares line on log arrivals, i.e. constant yearly growth.
+    - exp_smoothing: Holt's linear-trend exponential smoothing with grid-searched alpha/beta.
+
+Functions:
+    - fit_linear(years, values): Returns a forecast function.
+    - fit_huber(years, values, delta=1.345, iterations=50): Returns a forecast function.
+    - fit_log_linear(years, values): Returns a forecast function.
+    - fit_exp_smoothing(years, values): Returns a forecast function.
+    - fit_model(name, years, values, mask_years=None): Fits a registered model, optionally masking years.
+    - forecast(df, state, future_years, model='linear', mask_years=None): Forecasts one state from a trends frame.
+"""
+
+import numpy as np
+
+COVID_YEARS = (2020, 2021)
+
+
+def _line(intercept, slope, center):
+    return lambda future_years: intercept + slope * (np.asarray(future_years, dtype=np.float64) - center)
+
+
+def _weighted_line(x, y, weights):
+    w_sum = weights.sum()
+    mean_x = (weights * x).sum() / w_sum
+    mean_y = (weights * y).sum() / w_sum
+    var_x = (weights * (x - mean_x) ** 2).sum()
+    slope = (weights * (x - mean_x) * (y - mean_y)).sum() / var_x if var_x > 1e-12 else 0.0
+    return mean_y - slope * mean_x, slope
+
+
+def fit_linear(years, values):
+    center = years.mean()
+    intercept, slope = _weighted_line(years - center, values, np.ones_like(values))
+    return _line(intercept, slope, center)
+
+
+def fit_huber(years, values, delta=1.345, iterations=50):
+    center = years.mean()
+    x = years - center
+    weights = np.ones_like(values)
+    intercept, slope = _weighted_line(x, values, weights)
+    for _ in range(iterations):
+        residuals = values - (intercept + slope * x)
+        # Robust residual scale from the median absolute deviation
+        scale = np.median(np.abs(residuals - np.median(residuals))) / 0.6745
+        if scale <= 1e-12:
+            break
+        abs_scaled = np.abs(residuals) / scale
+        weights = np.where(abs_scaled <= delta, 1.0, delta / np.maximum(abs_scaled, 1e-12))
+        new_intercept, new_slope = _weighted_line(x, values, weights)
+        converged = np.isclose(new_slope, slope, rtol=1e-8) and np.isclose(new_intercept, intercept, rtol=1e-8)
+        intercept, slope = new_intercept, new_slope
+        if converged:
+            break
+    return _line(intercept, slope, center)
+
+
+def fit_log_linear(years, values):
+    log_forecast = fit_linear(years, np.log(np.maximum(values, 1.0)))
+    return lambda future_years: np.exp(log_forecast(future_years))
+
+
+def _holt(years, values, alpha, beta):
+    # Trend is kept per calendar year, so gaps left by masked years are stepped over at their real width
+    gaps = np.diff(years)
+    level, trend = values[0], (values[1] - values[0]) / gaps[0] if len(values) > 1 else 0.0
+    sse = 0.0
+    for gap, value in zip(gaps, values[1:]):
+        sse += (value - (level + trend * gap)) ** 2
+        previous_level = level
+        level = alpha * value + (1 - alpha) * (level + trend * gap)
+        trend = beta * (level - previous_level) / gap + (1 - beta) * trend
+    return level, trend, sse
+
+
+def fit_exp_smoothing(years, values, grid=(0.2, 0.4, 0.6, 0.8, 1.0)):
+    # Holt steps from year to year, so repeated years (e.g. one row per source) are averaged into one point
+    years, inverse = np.unique(years, return_inverse=True)
+    values = np.bincount(inverse, weights=values) / np.bincount(inverse)
+    best = min(
+        (_holt(years, values, alpha, beta) for alpha in grid for beta in grid),
+        key=lambda fitted: fitted[2]
+    )
+    level, trend, _ = best
+    last_year = years[-1]
+    return lambda future_years: level + trend * (np.asarray(future_years, dtype=np.float64) - last_year)
+
+
+MODELS = {
+    'linear': fit_linear,
+    'huber': fit_huber,
+    'log_linear': fit_log_linear,
+    'exp_smoothing': fit_exp_smoothing,
+}
+
+
+def fit_model(name, years, values, mask_years=None):
+    if name not in MODELS:
+        raise ValueError(f"Unknown forecasting model '{name}', expected one of {sorted(MODELS)}")
+    years = np.asarray(years, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(years, kind='stable')
+    years, values = years[order], values[order]
+    if mask_years:
+        keep = ~np.isin(years, mask_years)
+        # Never mask away everything; fall back to the full series
+        if keep.sum() >= 2:
+            years, values = years[keep], values[keep]
+    return MODELS[name](years, values)
+
+
+def forecast(df, state, future_years, model='linear', mask_years=None):
+    state_df = df[df['STATE'] == state]
+    if state_df.empty:
+        raise ValueError(f"No tourism history for state '{state}'")
+    predict = fit_model(model, state_df['YEAR'], state_df['DOMESTIC_ARRIVALS'], mask_years)
+    return predict(future_years)
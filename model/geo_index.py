@@ -0,0 +1,112 @@
+"""
+geo_index.py
+
+Synopsis:
+----------
+This module provides "sites near me" queries over cultural sites. A ball tree on haversine distance is
+built once per data version (or per DataFrame object, without one) over the LATITUDE/LONGITUDE columns, so
+radius and k-nearest lookups touch only the nearby part of the catalog instead of masking the whole
+DataFrame. Results have the same shape and index as recommend_sites (all site columns) plus a DISTANCE_KM
+column.
+
+Classes:
+    - SiteGeoIndex: Ball-tree index with radius and k-nearest queries.
+
+Functions:
+    - haversine_km(lat, lon, lats, lons): Vectorized great-circle distance in kilometres.
+    - get_geo_index(df, data_version=None): Returns the cached SiteGeoIndex for this data.
+    - sites_within_radius(df, lat, lon, radius_km, score_threshold=None, top_k=None): Top responsible sites within a radius.
+    - nearest_sites(df, lat, lon, k=5, score_threshold=None): The k closest sites.
+"""
+
+import numpy as np
+
+from model.fingerprint import frame_identity
+from model.instrumentation import register_cache, timed
+from model.lru_cache import TTLCache
+
+EARTH_RADIUS_KM = 6371.0088
+
+_indexes = register_cache('geo_indexes', TTLCache(maxsize=8, ttl=None))
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SiteGeoIndex:
+    def __init__(self, df, leaf_size=40):
+        from sklearn.neighbors import BallTree
+        # Tree rows are positions in self.df; results keep the caller's index labels, like recommend_sites
+        self.df = df.dropna(subset=['LATITUDE', 'LONGITUDE'])
+        coords = np.radians(self.df[['LATITUDE', 'LONGITUDE']].to_numpy(dtype=np.float64))
+        self.scores = self.df['RESPONSIBLE_SCORE'].to_numpy(dtype=np.float64)
+        self.tree = BallTree(coords, leaf_size=leaf_size, metric='haversine')
+
+    def __len__(self):
+        return len(self.df)
+
+    def _frame(self, rows, distances_km):
+        result = self.df.iloc[rows].copy()
+        result['DISTANCE_KM'] = distances_km
+        return result
+
+    def within_radius(self, lat, lon, radius_km, score_threshold=None, top_k=None, order_by='score'):
+        rows, distances = self.tree.query_radius(
+            np.radians([[lat, lon]]), r=radius_km / EARTH_RADIUS_KM, return_distance=True
+        )
+        rows, distances_km = rows[0], distances[0] * EARTH_RADIUS_KM
+        if score_threshold is not None:
+            keep = self.scores[rows] >= score_threshold
+            rows, distances_km = rows[keep], distances_km[keep]
+        if order_by == 'score':
+            # Best responsible score first, nearer sites first among equal scores
+            order = np.lexsort((distances_km, -self.scores[rows]))
+        else:
+            order = np.argsort(distances_km, kind='stable')
+        if top_k is not None:
+            order = order[:top_k]
+        return self._frame(rows[order], distances_km[order])
+
+    def nearest(self, lat, lon, k=5, score_threshold=None):
+        if len(self) == 0:
+            return self._frame([], [])
+        if score_threshold is not None:
+            eligible = int((self.scores >= score_threshold).sum())
+            k = min(k, eligible)
+        if k <= 0:
+            return self._frame([], [])
+        # Widen the neighbourhood until k sites pass the score filter
+        fetch = k
+        while True:
+            fetch = min(fetch, len(self))
+            distances, rows = self.tree.query(np.radians([[lat, lon]]), k=fetch)
+            rows, distances_km = rows[0], distances[0] * EARTH_RADIUS_KM
+            if score_threshold is not None:
+                keep = self.scores[rows] >= score_threshold
+                rows, distances_km = rows[keep], distances_km[keep]
+            if len(rows) >= k or fetch == len(self):
+                return self._frame(rows[:k], distances_km[:k])
+            fetch *= 4
+
+
+def get_geo_index(df, data_version=None):
+    key = data_version or frame_identity(df)
+    index = _indexes.get(key)
+    if index is None:
+        with timed('geo_index_build'):
+            index = SiteGeoIndex(df)
+        _indexes.put(key, index)
+    return index
+
+
+@timed('sites_within_radius')
+def sites_within_radius(df, lat, lon, radius_km, score_threshold=None, top_k=None, data_version=None):
+    return get_geo_index(df, data_version).within_radius(lat, lon, radius_km, score_threshold, top_k)
+
+
+@timed('nearest_sites')
+def nearest_sites(df, lat, lon, k=5, score_threshold=None, data_version=None):
+    return get_geo_index(df, data_version).nearest(lat, lon, k, score_threshold)
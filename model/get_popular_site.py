@@ -5,17 +5,100 @@ Synopsis:
 ----------
 This module provides functions to recommend top-rated cultural sites based on responsible tourism scores.
 It allows filtering by overall score or by state to highlight the most responsible and highly rated destinations.
+Lookups go through a SiteCatalog, built once per data version (or per DataFrame object, without one): rows
+are grouped by STATE, ART_FORM and SEASONALITY with every group pre-sorted by RESPONSIBLE_SCORE, so a
+threshold query is a binary search plus a slice instead of a full scan and sort.
+
+Classes:
+    - SiteCatalog: Pre-sorted, grouped index of the sites DataFrame.
 
 Functions:
+    - get_site_catalog(df, data_version=None): Returns the cached SiteCatalog for this data.
     - recommend_sites(df, score_threshold=8.0): Returns sites with responsible score above the threshold.
     - recommend_sites_by_state(df, state, score_threshold=8.0): Returns top sites for a given state above the threshold.
 """
 
+import numpy as np
 import pandas as pd
 
-def recommend_sites(df, score_threshold=8.0):
-    return df[df['RESPONSIBLE_SCORE'] >= score_threshold].sort_values(by='RESPONSIBLE_SCORE', ascending=False)
+from model.fingerprint import frame_identity
+from model.instrumentation import register_cache, timed
+from model.lru_cache import TTLCache
+
+_catalogs = register_cache('site_catalogs', TTLCache(maxsize=8, ttl=None))
+
+class SiteCatalog:
+    GROUP_COLUMNS = {'state': 'STATE', 'art_form': 'ART_FORM', 'seasonality': 'SEASONALITY'}
+
+    def __init__(self, df):
+        self.df = df
+        scores = df['RESPONSIBLE_SCORE'].to_numpy(dtype=np.float64)
+        # Stable descending order, so equal scores keep their original row order
+        self.order = np.argsort(-scores, kind='stable')
+        self.sorted_scores = scores[self.order]
+        self.codes = {}
+        self.groups = {}
+        for column in self.GROUP_COLUMNS.values():
+            codes, values = pd.factorize(df[column])
+            self.codes[column] = (codes, {value: code for code, value in enumerate(values)})
+            # Group the score-ordered positions by value; each group stays sorted by score
+            ordered_codes = codes[self.order]
+            by_group = np.argsort(ordered_codes, kind='stable')
+            offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(ordered_codes[ordered_codes >= 0], minlength=len(values)), out=offsets[1:])
+            positions = self.order[by_group][ordered_codes[by_group] >= 0]
+            self.groups[column] = (positions, scores[positions], offsets)
+
+    def __len__(self):
+        return len(self.df)
+
+    def _candidates(self, column, value):
+        positions, group_scores, offsets = self.groups[column]
+        code = self.codes[column][1].get(value)
+        if code is None:
+            return positions[:0], group_scores[:0]
+        start, end = offsets[code], offsets[code + 1]
+        return positions[start:end], group_scores[start:end]
+
+    def positions(self, score_threshold=8.0, limit=None, offset=0, **filters):
+        unknown = set(filters) - set(self.GROUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown site filter(s) {sorted(unknown)}, expected {sorted(self.GROUP_COLUMNS)}")
+        filters = {self.GROUP_COLUMNS[name]: value for name, value in filters.items() if value is not None}
+
+        # Start from the smallest matching group and mask the remaining filters on that slice
+        if filters:
+            column = min(filters, key=lambda c: len(self._candidates(c, filters[c])[0]))
+            candidates, candidate_scores = self._candidates(column, filters.pop(column))
+        else:
+            candidates, candidate_scores = self.order, self.sorted_scores
+        # Scores are descending, so the rows at or above the threshold are a prefix
+        end = np.searchsorted(-candidate_scores, -score_threshold, side='right')
+        candidates = candidates[:end]
+        for column, value in filters.items():
+            codes, lookup = self.codes[column]
+            candidates = candidates[codes[candidates] == lookup.get(value, -2)]
+        stop = None if limit is None else offset + limit
+        return candidates[offset:stop]
+
+    def top(self, score_threshold=8.0, limit=None, offset=0, **filters):
+        return self.df.iloc[self.positions(score_threshold, limit, offset, **filters)]
+
+def get_site_catalog(df, data_version=None):
+    # Without a version the catalog is cached per DataFrame object; hashing the frame would cost more than a scan
+    key = data_version or frame_identity(df)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with timed('site_catalog_build'):
+            catalog = SiteCatalog(df)
+        _catalogs.put(key, catalog)
+    return catalog
+
+@timed('recommend_sites')
+def recommend_sites(df, score_threshold=8.0, data_version=None):
+    return get_site_catalog(df, data_version).top(score_threshold)
 
-def recommend_sites_by_state(df, state, score_threshold=8.0):
+@timed('recommend_sites_by_state')
+def recommend_sites_by_state(df, state, score_threshold=8.0, data_version=None):
     # Filter by state and responsible score
-    return df[(df['STATE'] == state) & (df['RESPONSIBLE_SCORE'] >= score_threshold)].sort_values(by='RESPONSIBLE_SCORE', ascending=False)
+    return get_site_catalog(df, data_version).top(score_threshold, state=state)
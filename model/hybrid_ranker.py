@@ -0,0 +1,80 @@
+"""
+hybrid_ranker.py
+
+Synopsis:
+----------
+This module ranks cultural sites with one weighted score that fuses semantic similarity to the user's
+interests, the responsible tourism score, and whether the site's SEASONALITY suits the travel month.
+Optional STATE / ART_FORM filters are applied first on the compact catalog's integer codes, and only the
+surviving rows are scored against the query embedding, so a filtered query does less work than an
+unfiltered one. Everything after the single query encode is a NumPy pass over arrays.
+
+Functions:
+    - season_matches(seasonality_values, month): Boolean match of each seasonality value for a travel month.
+    - rank_sites(df, user_input=None, top_k=5, month=None, state=None, art_form=None, weights=None,
+      score_threshold=None, data_version=None): Returns the top_k sites by hybrid score.
+"""
+
+import numpy as np
+
+from model.compact_catalog import get_compact_catalog
+from model.instrumentation import timed
+
+DEFAULT_WEIGHTS = {'similarity': 0.6, 'responsible': 0.3, 'season': 0.1}
+
+# Travel months covered by each SEASONALITY value in cultural_sites
+SEASON_MONTHS = {
+    'Winter': {12, 1, 2},
+    'Spring': {3, 4, 5},
+    'Monsoon': {6, 7, 8, 9},
+    'Autumn': {10, 11},
+    'All Seasons': set(range(1, 13)),
+}
+
+
+def season_matches(seasonality_values, month):
+    return np.array([month in SEASON_MONTHS.get(value, ()) for value in seasonality_values], dtype=bool)
+
+
+@timed('rank_sites')
+def rank_sites(df, user_input=None, top_k=5, month=None, state=None, art_form=None, weights=None,
+               score_threshold=None, data_version=None):
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    use_text = bool(user_input and user_input.strip()) and weights['similarity'] != 0
+    catalog = get_compact_catalog(df, data_version, with_embeddings=use_text)
+
+    # Pre-filter on integer codes before any similarity work
+    mask = catalog.mask(state=state, art_form=art_form)
+    if score_threshold is not None:
+        mask &= catalog.scores >= score_threshold
+    filtered = not mask.all()
+    rows = np.flatnonzero(mask)
+
+    total = weights['responsible'] * (catalog.scores[rows] / 10.0)
+    similarity = np.zeros(len(rows), dtype=np.float32)
+    if use_text and len(rows):
+        from model.personalised_recommender import encode_queries
+        query = encode_queries([user_input])[0]
+        query = query / max(np.linalg.norm(query), 1e-12)
+        embeddings = catalog.embeddings[rows] if filtered else catalog.embeddings
+        similarity = embeddings @ query
+        total = total + weights['similarity'] * similarity
+    season = np.zeros(len(rows), dtype=bool)
+    if month is not None:
+        # Evaluate the month rule once per distinct seasonality value, then broadcast by code;
+        # a missing seasonality (code -1) never matches
+        codes = catalog.codes['SEASONALITY'][rows]
+        season = season_matches(catalog.values['SEASONALITY'], month)[codes] & (codes >= 0)
+        total = total + weights['season'] * season
+
+    k = min(top_k, len(rows))
+    if k <= 0:
+        best = np.empty(0, dtype=np.int64)
+    else:
+        best = np.argpartition(-total, k - 1)[:k]
+        best = best[np.argsort(-total[best], kind='stable')]
+    result = catalog.df.iloc[rows[best]].copy()
+    result['similarity'] = similarity[best]
+    result['season_match'] = season[best]
+    result['hybrid_score'] = total[best]
+    return result
@@ -0,0 +1,200 @@
+"""
+instrumentation.py
+
+Synopsis:
+----------
+In-process timing and cache metrics for the app, the HTTP service and the model layer, so a slow page can be
+attributed to a stage (data fetch, embedding, forecast fitting, map rendering, chart building, ...).
+
+    - timed(stage) wraps a function (decorator) or a block (context manager) and records its wall time into
+      a per-stage histogram.
+    - register_cache(name, cache) exposes a TTLCache's hit/miss/eviction counters and size.
+    - start_trace() / finish_trace() collect every stage that runs in between (including background work
+      started from the same context) into one trace, e.g. the breakdown of a single Streamlit rerun.
+    - prometheus_text() renders everything in the Prometheus text format (served on /metrics by api/service.py).
+
+Settings (environment variables):
+    - BHARATVERSE_METRICS: '0' disables timing; decorated functions are then returned unwrapped.
+    - BHARATVERSE_METRICS_LOG: Path of a JSONL file that receives one line per timed stage.
+
+Classes:
+    - Trace: Stage timings recorded between start_trace() and finish_trace().
+    - timed(stage): Decorator / context manager recording the duration of a stage.
+
+Functions:
+    - register_cache(name, cache): Adds a TTLCache to the exported cache metrics.
+    - start_trace(name): Starts collecting stage timings in the current context.
+    - finish_trace(trace): Stops collecting and returns the trace.
+    - stage_stats(): Returns count / total / max seconds per stage.
+    - cache_stats(): Returns the stats() of every registered cache.
+    - prometheus_text(): Returns all metrics in the Prometheus text exposition format.
+    - reset(): Clears the recorded stage timings.
+"""
+
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+ENABLED = os.environ.get('BHARATVERSE_METRICS', '1') != '0'
+LOG_PATH = os.environ.get('BHARATVERSE_METRICS_LOG')
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_stages = {}
+_caches = {}
+_log_file = None
+_current_trace = contextvars.ContextVar('bharatverse_trace', default=None)
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages.append((stage, seconds))
+
+    def breakdown(self):
+        """Returns [(stage, calls, total_seconds)] in first-seen order."""
+        with self._lock:
+            totals = {}
+            for stage, seconds in self.stages:
+                calls, total = totals.get(stage, (0, 0.0))
+                totals[stage] = (calls + 1, total + seconds)
+        return [(stage, calls, total) for stage, (calls, total) in totals.items()]
+
+
+def _record(stage, seconds):
+    global _log_file
+    with _lock:
+        entry = _stages.get(stage)
+        if entry is None:
+            entry = _stages[stage] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(BUCKETS) + 1)}
+        entry['count'] += 1
+        entry['sum'] += seconds
+        entry['max'] = max(entry['max'], seconds)
+        entry['buckets'][bisect.bisect_left(BUCKETS, seconds)] += 1
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+    if LOG_PATH:
+        line = json.dumps({'ts': time.time(), 'stage': stage, 'seconds': seconds,
+                           'trace': trace.name if trace is not None else None})
+        with _lock:
+            if _log_file is None:
+                # Line-buffered, so every record reaches the file without reopening it
+                _log_file = open(LOG_PATH, 'a', buffering=1)
+            _log_file.write(line + '\n')
+
+
+class timed:
+    def __init__(self, stage):
+        self.stage = stage
+        self._starts = threading.local()
+
+    def __enter__(self):
+        starts = getattr(self._starts, 'stack', None)
+        if starts is None:
+            starts = self._starts.stack = []
+        starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if ENABLED:
+            _record(self.stage, time.perf_counter() - self._starts.stack.pop())
+        else:
+            self._starts.stack.pop()
+        return False
+
+    def __call__(self, fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(self.stage, time.perf_counter() - start)
+        return wrapper
+
+
+def register_cache(name, cache):
+    with _lock:
+        _caches[name] = cache
+    return cache
+
+
+def start_trace(name):
+    trace = Trace(name)
+    trace.token = _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace):
+    trace.seconds = time.perf_counter() - trace.started
+    _current_trace.reset(trace.token)
+    return trace
+
+
+def stage_stats():
+    with _lock:
+        return {stage: {'count': e['count'], 'sum': e['sum'], 'max': e['max']} for stage, e in _stages.items()}
+
+
+def cache_stats():
+    with _lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    lines = [
+        '# HELP bharatverse_stage_seconds Wall time of instrumented stages.',
+        '# TYPE bharatverse_stage_seconds histogram',
+    ]
+    with _lock:
+        stages = {stage: dict(e, buckets=list(e['buckets'])) for stage, e in _stages.items()}
+    for stage, entry in sorted(stages.items()):
+        label = f'stage="{_label(stage)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, entry['buckets']):
+            cumulative += count
+            lines.append(f'bharatverse_stage_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'bharatverse_stage_seconds_bucket{{{label},le="+Inf"}} {entry["count"]}')
+        lines.append(f'bharatverse_stage_seconds_sum{{{label}}} {entry["sum"]:.6f}')
+        lines.append(f'bharatverse_stage_seconds_count{{{label}}} {entry["count"]}')
+
+    caches = cache_stats()
+    for metric, kind, help_text in (
+        ('hits', 'counter', 'Cache lookups that found a live entry.'),
+        ('misses', 'counter', 'Cache lookups that found no live entry.'),
+        ('evictions', 'counter', 'Entries dropped to stay within maxsize.'),
+        ('size', 'gauge', 'Entries currently held.'),
+    ):
+        name = f'bharatverse_cache_{metric}' + ('_total' if kind == 'counter' else '')
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for cache, stats in sorted(caches.items()):
+            lines.append(f'{name}{{cache="{_label(cache)}"}} {stats[metric]}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _stages.clear()
@@ -6,19 +6,129 @@ Synopsis:
 This module provides a function to recommend cultural sites based on user interests using NLP.
 It leverages sentence-transformers to compute semantic similarity between user input and site descriptions,
 returning the most relevant sites as personalized recommendations.
+Site descriptions are encoded once into a persisted embedding index (see embedding_index.py), and query
+embeddings are kept in a bounded LRU cache, so a repeated interest never reaches the transformer.
+The sentence-transformer (and torch) is only imported and loaded on first use, once per process, so
+importing this module stays cheap for workers that never serve an interest query. BHARATVERSE_ENCODER picks
+the backend (PyTorch, int8-quantized PyTorch or ONNX Runtime, see encoders.py).
 
 Functions:
-    - recommend_by_interest(df, user_input, top_k=1): Returns top-k sites matching user interests.
+    - get_model(): Returns the process-wide encoder of the configured backend, loading it on first call.
+    - warm_up(descriptions=None, data_version=None): Loads the model (and syncs the index) ahead of the first query.
+    - get_index(descriptions, data_version=None): Returns a read-only snapshot of the index synced with the descriptions.
+    - encode_queries(queries): Returns one embedding per query, encoding cache misses in a single batch.
+    - recommend_by_interest(df, user_input, top_k=2, data_version=None): Returns top-k sites matching user interests.
+    - recommend_by_interest_batch(df, queries, top_k=2, data_version=None): Returns one top-k result per query.
 """
 
-from sentence_transformers import SentenceTransformer, util
+import os
+import re
+import threading
+
+import numpy as np
 import pandas as pd
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from model.embedding_index import DEFAULT_INDEX_DIR, EmbeddingIndex
+from model.encoders import ENCODER, index_name, load_encoder
+from model.instrumentation import register_cache, timed
+from model.lru_cache import TTLCache
+
+INDEX_NAME = index_name(ENCODER)
+
+_model = None
+_model_lock = threading.Lock()
+
+query_cache = TTLCache(
+    maxsize=int(os.environ.get('BHARATVERSE_QUERY_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('BHARATVERSE_QUERY_CACHE_TTL', 24 * 3600))
+)
+register_cache('query_embeddings', query_cache)
+
+_index = None
+_index_lock = threading.Lock()
+# Read-only index snapshots per data version, so queries against one version never see another version's rows
+_snapshots = TTLCache(maxsize=int(os.environ.get('BHARATVERSE_INDEX_SNAPSHOTS', 4)), ttl=None)
+register_cache('index_snapshots', _snapshots)
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                with timed('model_load'):
+                    _model = load_encoder(ENCODER)
+    return _model
+
+def get_index(descriptions, data_version=None):
+    global _index
+    # A known data version skips re-hashing every description on each query
+    if data_version is not None:
+        snapshot = _snapshots.get(data_version)
+        if snapshot is not None:
+            return snapshot
+    with _index_lock:
+        if data_version is not None:
+            snapshot = _snapshots.get(data_version)
+            if snapshot is not None:
+                return snapshot
+        if _index is None:
+            _index = EmbeddingIndex.load(DEFAULT_INDEX_DIR, INDEX_NAME)
+        _index.sync(descriptions, get_model())
+        snapshot = _index.snapshot()
+        if data_version is not None:
+            _snapshots.put(data_version, snapshot)
+        return snapshot
+
+def warm_up(descriptions=None, data_version=None):
+    get_model()
+    if descriptions is not None:
+        get_index(descriptions, data_version)
+    encode_queries(['warm up'])
+
+def _query_key(text):
+    # The MiniLM tokenizer is uncased and ignores extra whitespace, so these variants embed identically
+    return re.sub(r'\s+', ' ', str(text)).strip().lower()
+
+def encode_queries(queries, batch_size=64):
+    keys = [_query_key(q) for q in queries]
+    vectors = {}
+    for key in dict.fromkeys(keys):
+        cached = query_cache.get(key)
+        if cached is not None:
+            vectors[key] = cached
+    missing = [k for k in dict.fromkeys(keys) if k not in vectors]
+    if missing:
+        model = get_model()
+        with timed('query_embedding'):
+            encoded = model.encode(missing, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        for key, vector in zip(missing, np.asarray(encoded, dtype=np.float32)):
+            query_cache.put(key, vector)
+            vectors[key] = vector
+    return np.stack([vectors[k] for k in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+def _to_frame(df, rows, scores):
+    result = df.iloc[rows].copy()
+    result['similarity'] = scores
+    return result
+
+@timed('recommend_by_interest')
+def recommend_by_interest(df, user_input, top_k=2, data_version=None):
+    df = df.dropna(subset=['DESCRIBTION'])
+    index = get_index(df['DESCRIBTION'], data_version)
+    user_vec = encode_queries([user_input])[0]
+    rows, scores = index.search(user_vec, top_k)
+    return _to_frame(df, rows, scores)
 
-def recommend_by_interest(df, user_input, top_k=2):
-    df = df.dropna(subset=['DESCRIBTION']).copy()
-    user_vec = model.encode(user_input)
-    df['embedding'] = df['DESCRIBTION'].apply(lambda x: model.encode(x))
-    df['similarity'] = df['embedding'].apply(lambda x: util.cos_sim(user_vec, x).item())
-    return df.sort_values('similarity', ascending=False).head(top_k)
+@timed('recommend_by_interest_batch')
+def recommend_by_interest_batch(df, queries, top_k=2, data_version=None):
+    queries = list(queries)
+    if not queries:
+        return []
+    df = df.dropna(subset=['DESCRIBTION'])
+    index = get_index(df['DESCRIBTION'], data_version)
+    results = index.search_batch(encode_queries(queries), top_k)
+    # One row gather for the whole batch, then a positional slice per query
+    combined = _to_frame(df, np.concatenate([rows for rows, _ in results]),
+                         np.concatenate([scores for _, scores in results]))
+    bounds = np.cumsum([0] + [len(rows) for rows, _ in results])
+    return [combined.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
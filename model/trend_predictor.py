@@ -5,26 +5,203 @@ Synopsis:
 ----------
 This module provides functions to train a linear regression model on tourism data and predict future domestic arrivals for a given state and year. 
 It is used to analyze and forecast tourism trends based on historical data.
+Forecasts come from TrendForecaster, which fits a least-squares line for every state at once with grouped,
+closed-form NumPy sums. Fitted coefficients are cached per data version (or per DataFrame object, without
+one), so moving the year slider only evaluates the cached line.
+The fit also keeps each group's residual variance, so forecasts can carry OLS prediction intervals. Bulk
+forecasts for every state are materialized into the tourism_forecasts table after ingestion (see
+database/materialize_forecasts.py); history_hashes() tells which stored rows still match the history.
+
+Classes:
+    - TrendForecaster: Vectorized per-group linear trend fit with whole-range predictions.
 
 Functions:
     - train_trend_model(df): Trains a linear regression model using 'YEAR' and 'DOMESTIC_ARRIVALS'.
-    - predict_future(df, state, future_year): Predicts domestic arrivals for a specific state and year using the trained model.
+    - get_forecaster(df, group_col='STATE', data_version=None): Returns the cached TrendForecaster for this data.
+    - predict_future(df, state, future_year, data_version=None): Predicts domestic arrivals for a specific state and year using the trained model (None without data).
+    - history_hashes(df, group_col='STATE'): Returns a content hash of every group's yearly history.
+    - current_forecasts(df_forecasts, df): Returns the materialized forecasts that still match the history.
 """
 
+import hashlib
+
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
+
+from model.fingerprint import frame_identity
+from model.instrumentation import register_cache, timed
+from model.lru_cache import TTLCache
+
+_forecasters = register_cache('forecasters', TTLCache(maxsize=16, ttl=None))
+
+FORECAST_YEARS = tuple(range(2025, 2031))
+FORECAST_LEVEL = 0.95
 
 def train_trend_model(df):
-    df['YEAR'] = df['YEAR'].astype(int)
-    df['DOMESTIC_ARRIVALS'] = df['DOMESTIC_ARRIVALS'].astype(int)
+    # Imported here so loading the app does not pay for sklearn until a forecast is requested
+    from sklearn.linear_model import LinearRegression
     model = LinearRegression()
-    X = df[['YEAR']]
-    y = df['DOMESTIC_ARRIVALS']
+    X = df[['YEAR']].astype(int)
+    y = df['DOMESTIC_ARRIVALS'].astype(int)
     model.fit(X, y)
     return model
 
-def predict_future(df, state, future_year):
-    state_df = df[df['STATE'] == state]
-    model = train_trend_model(state_df)
-    pred = model.predict([[future_year]])
-    return pred[0]
+class TrendForecaster:
+    def __init__(self, groups, intercepts, slopes, year_center, group_col='STATE',
+                 counts=None, mean_x=None, var_x=None, residual_var=None):
+        self.groups = pd.Index(groups)
+        self._positions = {group: i for i, group in enumerate(self.groups)}
+        self.intercepts = intercepts
+        self.slopes = slopes
+        self.year_center = year_center
+        self.group_col = group_col
+        # Per-group fit statistics for prediction intervals (centred years)
+        self.counts = counts
+        self.mean_x = mean_x
+        self.var_x = var_x
+        self.residual_var = residual_var
+        # Groups that appear in the data without a single usable (year, arrivals) row; they have no line
+        self.empty_groups = frozenset()
+
+    @classmethod
+    @timed('forecast_fit')
+    def fit(cls, df, group_col='STATE'):
+        codes, groups = pd.factorize(df[group_col], sort=True)
+        x = df['YEAR'].to_numpy(dtype=np.float64)
+        y = df['DOMESTIC_ARRIVALS'].to_numpy(dtype=np.float64)
+        valid = (codes >= 0) & ~np.isnan(x) & ~np.isnan(y)
+        codes, x, y = codes[valid], x[valid], y[valid]
+        year_center = x.mean() if len(x) else 0.0
+        x = x - year_center
+
+        # Per-group sums in one pass each; slope = cov(x, y) / var(x) for every group at once
+        k = len(groups)
+        n = np.bincount(codes, minlength=k).astype(np.float64)
+        sx = np.bincount(codes, weights=x, minlength=k)
+        sy = np.bincount(codes, weights=y, minlength=k)
+        sxx = np.bincount(codes, weights=x * x, minlength=k)
+        sxy = np.bincount(codes, weights=x * y, minlength=k)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_x = sx / n
+            mean_y = sy / n
+            var_x = sxx - sx * mean_x
+            slopes = np.where(var_x > 1e-12, (sxy - sx * mean_y) / var_x, 0.0)
+        intercepts = mean_y - slopes * mean_x
+
+        # Residuals from the fitted lines, rather than expanding sum(y^2), which cancels badly at these magnitudes
+        residuals = y - (intercepts[codes] + slopes[codes] * x)
+        sse = np.bincount(codes, weights=residuals * residuals, minlength=k)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            residual_var = np.where(n > 2, sse / (n - 2), np.nan)
+        # Groups without usable rows would only yield NaN lines; leave them out
+        fitted = n > 0
+        forecaster = cls(groups[fitted], intercepts[fitted], slopes[fitted], year_center, group_col,
+                         counts=n[fitted], mean_x=mean_x[fitted], var_x=var_x[fitted],
+                         residual_var=residual_var[fitted])
+        forecaster.empty_groups = frozenset(groups[~fitted])
+        return forecaster
+
+    def coefficients(self):
+        return pd.DataFrame({
+            self.group_col: self.groups,
+            'SLOPE': self.slopes,
+            'INTERCEPT': self.intercepts - self.slopes * self.year_center,
+        })
+
+    def _position(self, group):
+        position = self._positions.get(group)
+        if position is None:
+            raise ValueError(f"No tourism history for {self.group_col.lower()} '{group}'")
+        return position
+
+    def predict(self, group, years):
+        position = self._position(group)
+        years = np.asarray(years, dtype=np.float64)
+        return self.intercepts[position] + self.slopes[position] * (years - self.year_center)
+
+    def predict_all(self, years):
+        # Rows are groups, columns are years
+        years = np.atleast_1d(years)
+        offsets = years.astype(np.float64) - self.year_center
+        table = self.intercepts[:, None] + self.slopes[:, None] * offsets[None, :]
+        return pd.DataFrame(table, index=self.groups, columns=years)
+
+    def _half_widths(self, positions, offsets, level):
+        from scipy.stats import t
+
+        n = self.counts[positions][:, None]
+        dof = np.maximum(n - 2, 1)
+        # Prediction (not confidence) interval: a new year's arrivals, including the residual scatter
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = self.residual_var[positions][:, None] * (
+                1 + 1 / n + (offsets - self.mean_x[positions][:, None]) ** 2 / self.var_x[positions][:, None]
+            )
+        widths = t.ppf(0.5 + level / 2, dof) * np.sqrt(spread)
+        # Fewer than three years leave no residual degrees of freedom
+        return np.where(n > 2, widths, np.nan)
+
+    def predict_interval(self, group, years, level=FORECAST_LEVEL):
+        """Returns (forecast, lower, upper) arrays for `years`."""
+        position = self._position(group)
+        forecast = self.predict(group, years)
+        offsets = np.atleast_1d(np.asarray(years, dtype=np.float64)) - self.year_center
+        width = self._half_widths(np.array([position]), offsets[None, :], level)[0].reshape(np.shape(forecast))
+        # Arrivals cannot be negative, however wide the interval
+        return forecast, np.maximum(forecast - width, 0), forecast + width
+
+    def forecast_table(self, years=FORECAST_YEARS, level=FORECAST_LEVEL):
+        """Long table of every group x year with its forecast and prediction interval."""
+        years = np.atleast_1d(np.asarray(years))
+        offsets = years.astype(np.float64) - self.year_center
+        forecast = self.intercepts[:, None] + self.slopes[:, None] * offsets[None, :]
+        width = self._half_widths(np.arange(len(self.groups)), offsets[None, :], level)
+        return pd.DataFrame({
+            self.group_col: np.repeat(self.groups.to_numpy(dtype=object), len(years)),
+            'YEAR': np.tile(years.astype(np.int64), len(self.groups)),
+            'FORECAST': forecast.ravel(),
+            'LOWER': np.maximum(forecast - width, 0).ravel(),
+            'UPPER': (forecast + width).ravel(),
+            'CONFIDENCE': level,
+        })
+
+def get_forecaster(df, group_col='STATE', data_version=None):
+    # Hashing the history on every call costs as much as refitting it; key on the version or the frame object
+    key = (group_col, data_version or frame_identity(df))
+    forecaster = _forecasters.get(key)
+    if forecaster is None:
+        forecaster = TrendForecaster.fit(df, group_col)
+        _forecasters.put(key, forecaster)
+    return forecaster
+
+@timed('predict_future')
+def predict_future(df, state, future_year, data_version=None):
+    """Projected arrivals, or None for a state that is present but has no recorded arrivals."""
+    forecaster = get_forecaster(df, data_version=data_version)
+    if state in forecaster.empty_groups:
+        return None
+    return float(forecaster.predict(state, future_year))
+
+def history_hashes(df, group_col='STATE'):
+    # Dtype-independent (compacted frames hash like the raw table) and insensitive to row order; rows the
+    # forecaster cannot use (missing year or arrivals) are not part of the history
+    df = df.dropna(subset=['YEAR', 'DOMESTIC_ARRIVALS'])
+    history = pd.DataFrame({
+        group_col: df[group_col].astype(str).to_numpy(dtype=object),
+        'YEAR': df['YEAR'].to_numpy(dtype=np.int64),
+        'DOMESTIC_ARRIVALS': df['DOMESTIC_ARRIVALS'].to_numpy(dtype=np.int64),
+    }).sort_values([group_col, 'YEAR'], kind='stable')
+    rows = pd.util.hash_pandas_object(history[['YEAR', 'DOMESTIC_ARRIVALS']], index=False).to_numpy()
+    hashes = {}
+    for group, positions in history.groupby(group_col, sort=False).indices.items():
+        hashes[group] = hashlib.sha1(rows[positions].tobytes()).hexdigest()[:16]
+    return pd.Series(hashes, name='HISTORY_HASH', dtype=object)
+
+def current_forecasts(df_forecasts, df):
+    """Materialized rows, indexed by (STATE, YEAR), whose state history is unchanged since they were computed."""
+    if df_forecasts is None or df_forecasts.empty:
+        return None
+    hashes = history_hashes(df)
+    states = df_forecasts['STATE'].astype(str)
+    current = df_forecasts[states.map(hashes).to_numpy() == df_forecasts['HISTORY_HASH'].to_numpy()]
+    current = current.assign(STATE=states[current.index], YEAR=current['YEAR'].astype(np.int64))
+    return current.set_index(['STATE', 'YEAR']).sort_index()